@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Every analysis report from one load and one evaluation pass.
+
+The public cases are read once and calculate.js is evaluated once over all of
+them (in batch, through one node process). Every report stage then reads the
+same shared records, TripCases columns and calculator results instead of
+reloading public_cases.json or spawning node per case. Independent stages run
+concurrently in forked worker processes; each stage's output is captured and
+printed in stage order, so the report reads the same as running the scripts
+one after another.
+
+Usage: python3 analysis_pipeline.py [--stage receipts --stage per-day ...] [--list] [--workers N] [--resamples N]
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from itertools import compress
+
+import analyze_mileage
+import analyze_mileage_detailed
+import analyze_one_day
+import analyze_per_day
+import analyze_receipts
+import analyze_spending
+import comprehensive_analysis
+from calculators import get_calculator
+from scoring import VALID_OUTPUT
+from trip_cases import TripCases
+
+AnalysisContext = namedtuple('AnalysisContext', 'records scored_records cases calculate resamples')
+
+# Bootstrap resamples per interval; the standalone scripts use 10000, which dominates a pipeline run
+PIPELINE_RESAMPLES = 1000
+
+
+def load_context(path='public_cases.json', calculator='calculate.js', resamples=PIPELINE_RESAMPLES):
+    """Load the cases once and attach one batch evaluation of the calculator"""
+    with open(path, 'r') as f:
+        records = json.load(f)
+    cases = TripCases.from_records(records)
+    with get_calculator(calculator) as engine:
+        outputs = engine.evaluate(cases.durations, cases.miles, cases.receipts)
+
+    # Cases the calculator fails on ('ERROR' or anything else eval.sh rejects) are left
+    # out of every report that compares against it
+    valid = [bool(VALID_OUTPUT.match(output)) for output in outputs]
+    if not all(valid):
+        print(f"⚠️  {calculator} failed on {valid.count(False)} of {len(valid)} cases; "
+              f"they are left out of the calculator reports")
+    scored_records = list(compress(records, valid))
+    current = [float(output) for output in compress(outputs, valid)]
+    # Scored and ordered worst-first, as comprehensive_analysis.py hands them to its reports
+    cases = cases.where(valid).with_current(current).sorted_by('error', reverse=True)
+
+    # Per-case lookups for the reports that filter the raw records first
+    results = {(d, m, r): value for d, m, r, value in zip(cases.durations, cases.miles, cases.receipts, cases.current)}
+
+    def calculate(duration, miles, receipts):
+        return results[(duration, miles, receipts)]
+
+    return AnalysisContext(records, scored_records, cases, calculate, resamples)
+
+
+# ==========================================
+# STAGES
+# ==========================================
+def errors_stage(context):
+    print("🔍 COMPREHENSIVE SOLUTION ANALYSIS")
+    print("="*50)
+    comprehensive_analysis.analyze_error_patterns(context.cases, context.cases.current)
+
+
+def bias_stage(context):
+    comprehensive_analysis.analyze_systematic_bias(context.cases, context.resamples)
+
+
+def penalties_stage(context):
+    comprehensive_analysis.analyze_spending_penalty_issues(context.cases)
+
+
+def opportunities_stage(context):
+    comprehensive_analysis.identify_improvement_opportunities(context.cases)
+
+
+def receipts_stage(context):
+    analyze_receipts.analyze_receipt_rates(context.records)
+    analyze_receipts.analyze_current_receipt_accuracy(context.scored_records, context.calculate)
+    analyze_receipts.analyze_tiny_receipt_patterns(context.records)
+    analyze_receipts.analyze_receipt_thresholds(context.records)
+
+
+def mileage_stage(context):
+    analyze_mileage.analyze_mileage_patterns(context.records)
+    analyze_mileage.analyze_low_variable_cases(context.records)
+    analyze_mileage.analyze_mileage_tiers(context.records)
+
+
+def mileage_detailed_stage(context):
+    analyze_mileage_detailed.test_current_mileage_accuracy(context.scored_records, context.calculate)
+    analyze_mileage_detailed.analyze_mileage_breakpoints(context.records)
+    analyze_mileage_detailed.analyze_current_vs_optimal_rates()
+
+
+def per_day_stage(context):
+    analyze_per_day.analyze_per_day_patterns(context.records, context.resamples)
+
+
+def spending_stage(context):
+    analyze_spending.analyze_high_receipt_cases(context.scored_records, context.calculate)
+    analyze_spending.analyze_spending_limits(context.records)
+
+
+def one_day_stage(context):
+    analyze_one_day.analyze_one_day_cases(context.records)
+
+
+# Report stages in output order: name -> (function, description)
+STAGES = {
+    'errors': (errors_stage, 'highest-error cases (comprehensive_analysis.py)'),
+    'bias': (bias_stage, 'over/under bias by duration and receipt level'),
+    'penalties': (penalties_stage, 'spending penalty mismatches'),
+    'opportunities': (opportunities_stage, 'error distribution and improvement opportunities'),
+    'receipts': (receipts_stage, 'analyze_receipts.py'),
+    'mileage': (mileage_stage, 'analyze_mileage.py'),
+    'mileage-detailed': (mileage_detailed_stage, 'analyze_mileage_detailed.py'),
+    'per-day': (per_day_stage, 'analyze_per_day.py'),
+    'spending': (spending_stage, 'analyze_spending.py'),
+    'one-day': (one_day_stage, 'analyze_one_day.py'),
+}
+
+# Shared with forked workers, which inherit it instead of receiving a pickled copy
+_CONTEXT = None
+
+
+def run_stage(name):
+    """Run one stage and return (captured output, seconds)"""
+    started = time.perf_counter()
+    output = io.StringIO()
+    with redirect_stdout(output):
+        STAGES[name][0](_CONTEXT)
+    return output.getvalue(), time.perf_counter() - started
+
+
+def run_pipeline(names, context, workers=None):
+    """Yield (name, output, seconds) for each stage, in the order given"""
+    global _CONTEXT
+    _CONTEXT = context
+    workers = min(workers or os.cpu_count() or 1, len(names))
+    if workers <= 1:
+        for name in names:
+            yield (name,) + run_stage(name)
+        return
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+        futures = [(name, pool.submit(run_stage, name)) for name in names]
+        for name, future in futures:
+            yield (name,) + future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stage', action='append', choices=list(STAGES), help='stage to run (default: all)')
+    parser.add_argument('--list', action='store_true', help='list the available stages')
+    parser.add_argument('--workers', type=int, default=None, help='concurrent stages (default: CPU count)')
+    parser.add_argument('--calculator', default='calculate.js', help='calculator spec (see calculators.py)')
+    parser.add_argument('--resamples', type=int, default=PIPELINE_RESAMPLES,
+                        help=f'bootstrap resamples per confidence interval (default: {PIPELINE_RESAMPLES})')
+    parser.add_argument('--timings', action='store_true', help='report per-stage timings at the end')
+    args = parser.parse_args()
+
+    if args.list:
+        for name, (_, description) in STAGES.items():
+            print(f"{name:17s} {description}")
+        return
+
+    names = args.stage or list(STAGES)
+    started = time.perf_counter()
+    context = load_context(calculator=args.calculator, resamples=args.resamples)
+    load_seconds = time.perf_counter() - started
+
+    timings = []
+    for name, output, seconds in run_pipeline(names, context, args.workers):
+        print(output, end='')
+        timings.append((name, seconds))
+
+    if args.timings:
+        print(f"\n=== PIPELINE TIMINGS ===")
+        print(f"{'load + evaluate':17s} {load_seconds:7.2f}s")
+        for name, seconds in timings:
+            print(f"{name:17s} {seconds:7.2f}s")
+        print(f"{'total':17s} {time.perf_counter() - started:7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,9 @@ def load_test_cases():
     with open('public_cases.json', 'r') as f:
         return json.load(f)
 
-def analyze_mileage_patterns():
-    cases = load_test_cases()
+def analyze_mileage_patterns(cases=None):
+    if cases is None:
+        cases = load_test_cases()
     
     print("=== MILEAGE ANALYSIS ===")
     print("Looking for patterns in mileage reimbursement rates...\n")
@@ -65,9 +66,10 @@ def analyze_mileage_patterns():
                 range_str = f"{range_key[0]}-{range_key[1]}"
                 print(f"{range_str:12s} | {len(cases_in_range):5d} | {avg_per_mile:10.2f} | {min_per_mile:10.2f} | {max_per_mile:10.2f} | {std_dev:7.2f}")
 
-def analyze_low_variable_cases():
+def analyze_low_variable_cases(cases=None):
     """Analyze cases with low receipts and short duration to isolate mileage component"""
-    cases = load_test_cases()
+    if cases is None:
+        cases = load_test_cases()
     
     print("\n=== MILEAGE ISOLATION ANALYSIS ===")
     print("Cases with low receipts (<$50) and short duration (1-2 days) to isolate mileage rates:")
@@ -113,9 +115,10 @@ def analyze_low_variable_cases():
         print(f"Min $/mile: {min(per_mile_rates):.3f}")
         print(f"Max $/mile: {max(per_mile_rates):.3f}")
 
-def analyze_mileage_tiers():
+def analyze_mileage_tiers(cases=None):
     """Look for evidence of tiered mileage rates"""
-    cases = load_test_cases()
+    if cases is None:
+        cases = load_test_cases()
     
     print("\n=== MILEAGE TIER ANALYSIS ===")
     print("Looking for tiered rates at common breakpoints (100, 300, 600 miles)...")
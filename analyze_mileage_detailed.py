@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 import json
-import subprocess
 
-def test_current_mileage_accuracy():
+from calculators import run_calculator
+
+def test_current_mileage_accuracy(cases=None, calculate=run_calculator):
     """Test our current mileage calculation against expected results"""
-    with open('public_cases.json', 'r') as f:
-        cases = json.load(f)
+    if cases is None:
+        with open('public_cases.json', 'r') as f:
+            cases = json.load(f)
     
     print("=== CURRENT MILEAGE CALCULATION ACCURACY ===")
     print("Testing cases with minimal variables to isolate mileage performance...")
@@ -31,9 +33,7 @@ def test_current_mileage_accuracy():
         expected = case['expected_output']
         
         # Get current result
-        result = subprocess.run(['node', 'calculate.js', str(duration), str(miles), str(receipts)], 
-                              capture_output=True, text=True)
-        current = float(result.stdout.strip())
+        current = calculate(duration, miles, receipts)
         
         # Calculate error
         error = abs(current - expected)
@@ -48,10 +48,11 @@ def test_current_mileage_accuracy():
     avg_error = total_error / len(mileage_test_cases[:20])
     print(f"\nAverage error in mileage-focused cases: ${avg_error:.2f}")
 
-def analyze_mileage_breakpoints():
+def analyze_mileage_breakpoints(cases=None):
     """Analyze specific mileage breakpoints to understand tier structure"""
-    with open('public_cases.json', 'r') as f:
-        cases = json.load(f)
+    if cases is None:
+        with open('public_cases.json', 'r') as f:
+            cases = json.load(f)
     
     print("\n=== MILEAGE BREAKPOINT ANALYSIS ===")
     print("Looking for evidence of tiered rates at 100, 300, 600 mile breakpoints...")
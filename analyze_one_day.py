@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 import json
 
-def analyze_one_day_cases():
-    with open('public_cases.json', 'r') as f:
-        cases = json.load(f)
+def analyze_one_day_cases(cases=None):
+    if cases is None:
+        with open('public_cases.json', 'r') as f:
+            cases = json.load(f)
     
     one_day_cases = [case for case in cases if case['input']['trip_duration_days'] == 1]
     
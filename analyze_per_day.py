@@ -3,12 +3,22 @@ import json
 import statistics
 from collections import defaultdict
 
+from bootstrap import bootstrap, format_interval
+
+# Trip length buckets: (shortest, longest) duration in days
+TRIP_LENGTHS = {
+    'Short trips (1-3 days)': (1, 3),
+    'Medium trips (4-6 days)': (4, 6),
+    'Long trips (7+ days)': (7, float('inf')),
+}
+
 def load_test_cases():
     with open('public_cases.json', 'r') as f:
         return json.load(f)
 
-def analyze_per_day_patterns():
-    cases = load_test_cases()
+def analyze_per_day_patterns(cases=None, resamples=10000):
+    if cases is None:
+        cases = load_test_cases()
     
     # Group cases by trip duration
     by_duration = defaultdict(list)
@@ -25,9 +35,24 @@ def analyze_per_day_patterns():
             'per_day': expected / duration
         })
     
+    # Bootstrap every duration bucket and every minimal-variable bucket in one pass
+    minimal_cases = defaultdict(list)
+    for case in cases:
+        if case['input']['miles_traveled'] < 100 and case['input']['total_receipts_amount'] < 100:
+            duration = case['input']['trip_duration_days']
+            minimal_cases[duration].append(case['expected_output'] / duration)
+    
+    buckets = {('all', duration): [case['per_day'] for case in cases_for_duration]
+               for duration, cases_for_duration in by_duration.items()}
+    buckets.update({('minimal', duration): values for duration, values in minimal_cases.items()})
+    for length, (low, high) in TRIP_LENGTHS.items():
+        buckets[('length', length)] = [case['per_day'] for duration, cases_for_duration in by_duration.items()
+                                       if low <= duration <= high for case in cases_for_duration]
+    intervals = bootstrap(buckets, resamples)
+    
     print("=== PER DAY ANALYSIS ===")
-    print("Duration | Count | Avg Per Day | Min Per Day | Max Per Day | Std Dev")
-    print("-" * 70)
+    print("Duration | Count | Avg Per Day |   95% CI (Per Day) | Min Per Day | Max Per Day | Std Dev")
+    print("-" * 91)
     
     duration_stats = {}
     for duration in sorted(by_duration.keys()):
@@ -47,7 +72,8 @@ def analyze_per_day_patterns():
             'count': len(cases_for_duration)
         }
         
-        print(f"{duration:8d} | {len(cases_for_duration):5d} | {avg_per_day:11.2f} | {min_per_day:11.2f} | {max_per_day:11.2f} | {std_dev:7.2f}")
+        per_day_ci = format_interval(intervals.mean(('all', duration)), 18)
+        print(f"{duration:8d} | {len(cases_for_duration):5d} | {avg_per_day:11.2f} | {per_day_ci} | {min_per_day:11.2f} | {max_per_day:11.2f} | {std_dev:7.2f}")
     
     print("\n=== PATTERN ANALYSIS ===")
     
@@ -55,40 +81,31 @@ def analyze_per_day_patterns():
     print("\n5-day cases analysis:")
     five_day_cases = by_duration[5]
     five_day_per_day = [case['per_day'] for case in five_day_cases]
-    print(f"5-day average per day: {statistics.mean(five_day_per_day):.2f}")
+    print(f"5-day average per day: {statistics.mean(five_day_per_day):.2f} (95% CI {format_interval(intervals.mean(('all', 5)))})")
+    for neighbour in (4, 6):
+        if neighbour in by_duration:
+            difference = intervals.difference(('all', 5), ('all', neighbour))
+            print(f"5-day minus {neighbour}-day per day: {difference.mean:.2f} (95% CI {format_interval(difference)})")
     
-    # Compare short vs medium vs long trips
-    short_trips = []  # 1-3 days
-    medium_trips = []  # 4-6 days
-    long_trips = []   # 7+ days
-    
-    for duration, stats in duration_stats.items():
-        if duration <= 3:
-            short_trips.extend([stats['avg']] * stats['count'])
-        elif duration <= 6:
-            medium_trips.extend([stats['avg']] * stats['count'])
-        else:
-            long_trips.extend([stats['avg']] * stats['count'])
-    
-    print(f"\nTrip length comparison:")
-    print(f"Short trips (1-3 days): avg {statistics.mean([duration_stats[d]['avg'] for d in range(1, 4) if d in duration_stats]):.2f}")
-    print(f"Medium trips (4-6 days): avg {statistics.mean([duration_stats[d]['avg'] for d in range(4, 7) if d in duration_stats]):.2f}")
-    print(f"Long trips (7+ days): avg {statistics.mean([duration_stats[d]['avg'] for d in range(7, 15) if d in duration_stats]):.2f}")
+    # Compare short vs medium vs long trips, per case
+    print(f"\nTrip length comparison (per day):")
+    lengths = [length for length in TRIP_LENGTHS if buckets[('length', length)]]
+    for length in lengths:
+        estimate = intervals.mean(('length', length))
+        print(f"{length}: avg {estimate.mean:.2f} over {estimate.count} cases (95% CI {format_interval(estimate)})")
+    for index, a in enumerate(lengths):
+        for b in lengths[index + 1:]:
+            difference = intervals.difference(('length', a), ('length', b))
+            print(f"{a.split()[0]} minus {b.split()[0].lower()}: {difference.mean:.2f} (95% CI {format_interval(difference)})")
     
     # Analyze cases with minimal variables (low miles, low receipts)
     print("\n=== MINIMAL VARIABLE ANALYSIS ===")
     print("Looking at cases with low miles (<100) and low receipts (<100) to isolate per diem:")
     
-    minimal_cases = defaultdict(list)
-    for case in cases:
-        if case['input']['miles_traveled'] < 100 and case['input']['total_receipts_amount'] < 100:
-            duration = case['input']['trip_duration_days']
-            minimal_cases[duration].append(case['expected_output'] / duration)
-    
     for duration in sorted(minimal_cases.keys()):
         if minimal_cases[duration]:
             avg_minimal = statistics.mean(minimal_cases[duration])
-            print(f"Duration {duration}: {len(minimal_cases[duration])} cases, avg per day: {avg_minimal:.2f}")
+            print(f"Duration {duration}: {len(minimal_cases[duration])} cases, avg per day: {avg_minimal:.2f} (95% CI {format_interval(intervals.mean(('minimal', duration)))})")
 
 if __name__ == "__main__":
     analyze_per_day_patterns() 
\ No newline at end of file
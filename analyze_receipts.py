@@ -1,16 +1,19 @@
 #!/usr/bin/env python3
 import json
-import subprocess
 import statistics
 from collections import defaultdict
 
+from bootstrap import MIN_BUCKET_SIZE, bootstrap, format_interval, too_small
+from calculators import run_calculator
+
 def load_test_cases():
     with open('public_cases.json', 'r') as f:
         return json.load(f)
 
-def analyze_receipt_rates():
+def analyze_receipt_rates(cases=None):
     """Analyze receipt reimbursement rates across different receipt amounts"""
-    cases = load_test_cases()
+    if cases is None:
+        cases = load_test_cases()
     
     print("=== RECEIPT REIMBURSEMENT RATE ANALYSIS ===")
     print("Looking for patterns in receipt reimbursement rates...\n")
@@ -82,9 +85,10 @@ def analyze_receipt_rates():
                     
                     print(f"{range_str:13s} | {len(cases_in_range):5d} | {avg_rate:8.2f} | {min_rate:8.2f} | {max_rate:8.2f} | {avg_est_reimb:12.2f}")
 
-def analyze_current_receipt_accuracy():
+def analyze_current_receipt_accuracy(cases=None, calculate=run_calculator):
     """Test our current receipt calculation against expected results"""
-    cases = load_test_cases()
+    if cases is None:
+        cases = load_test_cases()
     
     print("\n=== CURRENT RECEIPT CALCULATION ACCURACY ===")
     print("Testing cases to isolate receipt reimbursement performance...")
@@ -114,9 +118,7 @@ def analyze_current_receipt_accuracy():
         expected = case['expected_output']
         
         # Get current result
-        result = subprocess.run(['node', 'calculate.js', str(duration), str(miles), str(receipts)], 
-                              capture_output=True, text=True)
-        current = float(result.stdout.strip())
+        current = calculate(duration, miles, receipts)
         error = abs(current - expected)
         total_error += error
         
@@ -131,9 +133,10 @@ def analyze_current_receipt_accuracy():
         avg_error = total_error / len(receipt_test_cases[:25])
         print(f"\nAverage error in receipt-focused cases: ${avg_error:.2f}")
 
-def analyze_tiny_receipt_patterns():
+def analyze_tiny_receipt_patterns(cases=None):
     """Analyze the 'tiny receipts worse than no receipts' pattern"""
-    cases = load_test_cases()
+    if cases is None:
+        cases = load_test_cases()
     
     print("\n=== TINY RECEIPT ANALYSIS ===")
     print("Analyzing very small receipt amounts vs no receipts...")
@@ -169,21 +172,31 @@ def analyze_tiny_receipt_patterns():
     print(f"Tiny receipt cases ($0-30, duration <= 3, miles < 300): {len(tiny_receipt_cases)}")
     
     if no_receipt_cases and tiny_receipt_cases:
-        no_receipt_avg = statistics.mean([case['per_day'] for case in no_receipt_cases])
-        tiny_receipt_avg = statistics.mean([case['per_day'] for case in tiny_receipt_cases])
+        intervals = bootstrap({
+            'none': [case['per_day'] for case in no_receipt_cases],
+            'tiny': [case['per_day'] for case in tiny_receipt_cases],
+        })
+        no_receipt = intervals.mean('none')
+        tiny_receipt = intervals.mean('tiny')
+        difference = intervals.difference('none', 'tiny')
         
-        print(f"Average per-day reimbursement with no receipts: ${no_receipt_avg:.2f}")
-        print(f"Average per-day reimbursement with tiny receipts: ${tiny_receipt_avg:.2f}")
-        print(f"Difference: ${no_receipt_avg - tiny_receipt_avg:.2f}")
+        print(f"Average per-day reimbursement with no receipts: ${no_receipt.mean:.2f} (95% CI {format_interval(no_receipt)})")
+        print(f"Average per-day reimbursement with tiny receipts: ${tiny_receipt.mean:.2f} (95% CI {format_interval(tiny_receipt)})")
+        print(f"Difference: ${difference.mean:.2f} (95% CI {format_interval(difference)})")
         
-        if tiny_receipt_avg < no_receipt_avg:
+        if too_small(difference):
+            print(f"? Inconclusive: fewer than {MIN_BUCKET_SIZE} cases on one side")
+        elif difference.low > 0:
             print("✓ Confirms: Tiny receipts DO result in lower reimbursements than no receipts")
-        else:
+        elif difference.high < 0:
             print("✗ Data doesn't support tiny receipt penalty")
+        else:
+            print("? Inconclusive: the 95% CI for the difference includes zero")
 
-def analyze_receipt_thresholds():
+def analyze_receipt_thresholds(cases=None):
     """Look for evidence of specific receipt amount thresholds"""
-    cases = load_test_cases()
+    if cases is None:
+        cases = load_test_cases()
     
     print("\n=== RECEIPT THRESHOLD ANALYSIS ===")
     print("Looking for breakpoints in receipt reimbursement rates...")
@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 import json
-import subprocess
 
-def analyze_high_receipt_cases():
+from calculators import run_calculator
+
+def analyze_high_receipt_cases(cases=None, calculate=run_calculator):
     """Analyze cases with high receipts to understand spending logic"""
-    with open('public_cases.json', 'r') as f:
-        cases = json.load(f)
+    if cases is None:
+        with open('public_cases.json', 'r') as f:
+            cases = json.load(f)
     
     print("=== HIGH RECEIPT SPENDING ANALYSIS ===")
     print("Cases with high receipts to understand spending penalty patterns...")
@@ -25,9 +27,7 @@ def analyze_high_receipt_cases():
             expected_per_day = expected / duration
             
             # Get current result
-            result = subprocess.run(['node', 'calculate.js', str(duration), str(miles), str(receipts)], 
-                                  capture_output=True, text=True)
-            current = float(result.stdout.strip())
+            current = calculate(duration, miles, receipts)
             error = abs(current - expected)
             
             high_receipt_cases.append({
@@ -51,10 +51,11 @@ def analyze_high_receipt_cases():
     avg_error = sum(case['error'] for case in high_receipt_cases) / len(high_receipt_cases)
     print(f"Average error in high-receipt cases: ${avg_error:.2f}")
 
-def analyze_spending_limits():
+def analyze_spending_limits(cases=None):
     """Analyze what spending limits the legacy system actually uses"""
-    with open('public_cases.json', 'r') as f:
-        cases = json.load(f)
+    if cases is None:
+        with open('public_cases.json', 'r') as f:
+            cases = json.load(f)
     
     print("\n=== SPENDING LIMIT ANALYSIS ===")
     print("Looking for patterns in spending vs expected reimbursement...")
@@ -0,0 +1,37 @@
+// ==========================================
+// BATCH CALCULATOR PROCESS
+// ==========================================
+// Long-lived wrapper around any calculator module that exports
+// calculateReimbursement. Reads one "days miles receipts" case per line on
+// stdin and, at each empty line, writes the results for the batch, one per
+// line. Arguments are parsed exactly like the calculators' own CLI so that
+// batch results match ./run.sh output.
+//
+// Usage: node batch_calculate.js <calculator.js>
+
+const path = require('path');
+const readline = require('readline');
+
+const calculatorPath = path.resolve(process.argv[2] || 'calculate_formula.js');
+const { calculateReimbursement } = require(calculatorPath);
+
+const input = readline.createInterface({ input: process.stdin, terminal: false });
+let results = [];
+
+input.on('line', (line) => {
+    if (line === '') {
+        results.push('');
+        process.stdout.write(results.join('\n'));
+        results = [];
+        return;
+    }
+    const args = line.split(' ');
+    const trip_duration_days = parseInt(args[0], 10);
+    const miles_traveled = parseInt(args[1], 10);
+    const total_receipts_amount = parseFloat(args[2]);
+    try {
+        results.push(String(calculateReimbursement(trip_duration_days, miles_traveled, total_receipts_amount)));
+    } catch (err) {
+        results.push('ERROR');
+    }
+});
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Bootstrap confidence intervals for bucket means and bucket differences.
+
+All buckets are resampled together: each resample draws a full index set for
+every bucket, so one pass yields the mean distribution of every bucket and,
+from the same draws, of every difference between buckets. Resamples are
+split into seeded chunks and spread across a process pool.
+"""
+import os
+import random
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+Estimate = namedtuple('Estimate', ['mean', 'low', 'high', 'count'])
+
+# Below this many cases a percentile interval is degenerate (zero width at n=1) or meaningless
+MIN_BUCKET_SIZE = 5
+
+
+def _resample_chunk(job):
+    """Mean of every bucket for `resamples` bootstrap draws"""
+    bucket_values, resamples, seed = job
+    rng = random.Random(seed)
+    choices = rng.choices
+    distributions = []
+    for values in bucket_values:
+        n = len(values)
+        distributions.append([sum(choices(values, k=n)) / n for _ in range(resamples)])
+    return distributions
+
+
+def _percentile(sorted_values, q):
+    position = q * (len(sorted_values) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class BootstrapResult:
+    """Observed means and resampled mean distributions for a set of buckets"""
+
+    def __init__(self, observed, counts, distributions, confidence):
+        self.observed = observed
+        self.counts = counts
+        self.distributions = distributions
+        self.confidence = confidence
+
+    def _interval(self, distribution):
+        ordered = sorted(distribution)
+        tail = (1 - self.confidence) / 2
+        return _percentile(ordered, tail), _percentile(ordered, 1 - tail)
+
+    def mean(self, name):
+        """Observed mean of a bucket with its percentile confidence interval"""
+        low, high = self._interval(self.distributions[name])
+        return Estimate(self.observed[name], low, high, self.counts[name])
+
+    def difference(self, a, b):
+        """mean(a) - mean(b) with a confidence interval from the paired resamples"""
+        low, high = self._interval([x - y for x, y in zip(self.distributions[a], self.distributions[b])])
+        return Estimate(self.observed[a] - self.observed[b], low, high, min(self.counts[a], self.counts[b]))
+
+
+def bootstrap(buckets, resamples=10000, confidence=0.95, seed=0, workers=None, chunk_size=500):
+    """Resample every bucket {name: values} at once and return a BootstrapResult"""
+    names = [name for name, values in buckets.items() if len(values) > 0]
+    bucket_values = [list(buckets[name]) for name in names]
+
+    jobs = []
+    for chunk, start in enumerate(range(0, resamples, chunk_size)):
+        jobs.append((bucket_values, min(chunk_size, resamples - start), seed * 1000003 + chunk))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        chunks = map(_resample_chunk, jobs)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_resample_chunk, jobs))
+
+    distributions = {name: [] for name in names}
+    for chunk in chunks:
+        for name, means in zip(names, chunk):
+            distributions[name].extend(means)
+
+    observed = {name: sum(values) / len(values) for name, values in zip(names, bucket_values)}
+    counts = {name: len(values) for name, values in zip(names, bucket_values)}
+    return BootstrapResult(observed, counts, distributions, confidence)
+
+
+def too_small(estimate):
+    """Whether an estimate (or either side of a difference) has too few cases for its interval"""
+    return estimate.count < MIN_BUCKET_SIZE
+
+
+def format_interval(estimate, width=0, places=2):
+    """Render an estimate's interval as [low, high], or 'n too small' for a tiny bucket"""
+    text = 'n too small' if too_small(estimate) else f"[{estimate.low:.{places}f}, {estimate.high:.{places}f}]"
+    return f"{text:>{width}s}"
@@ -0,0 +1,64 @@
+// ==========================================
+// REGION-WEIGHTED ENSEMBLE
+// ==========================================
+// Blends the engines listed in ensemble_weights.json with the weights that
+// ensemble.py learned for each (D, miles_per_day, spending_per_day) region.
+// Only engines with a non-zero weight in the trip's region are loaded and
+// evaluated, so most trips cost a single engine evaluation.
+
+const path = require('path');
+const ENSEMBLE = require(path.join(__dirname, 'ensemble_weights.json'));
+const engines = [];
+
+function engine(index) {
+    if (!engines[index]) {
+        engines[index] = require(path.join(__dirname, ENSEMBLE.engines[index])).calculateReimbursement;
+    }
+    return engines[index];
+}
+
+// Number of leading edges the value has reached
+function binOf(edges, value) {
+    let index = 0;
+    while (index < edges.length && value >= edges[index]) {
+        index++;
+    }
+    return index;
+}
+
+function calculateReimbursement(trip_duration_days, miles_traveled, total_receipts_amount) {
+    const D = trip_duration_days;
+    const M = miles_traveled;
+    const R = total_receipts_amount;
+
+    const region = [
+        binOf(ENSEMBLE.edges.D, D),
+        binOf(ENSEMBLE.edges.miles_per_day, M / D),
+        binOf(ENSEMBLE.edges.spending_per_day, R / D),
+    ].join(',');
+    const weights = ENSEMBLE.weights[region] || ENSEMBLE.default_weights;
+
+    let reimbursement = 0;
+    for (let i = 0; i < ENSEMBLE.engines.length; i++) {
+        if (weights[i]) {
+            reimbursement += weights[i] * Number(engine(i)(D, M, R));
+        }
+    }
+
+    return reimbursement.toFixed(2);
+}
+
+// ==========================================
+// COMMAND LINE INTERFACE
+// ==========================================
+if (require.main === module) {
+    const args = process.argv.slice(2);
+    const trip_duration_days = parseInt(args[0], 10);
+    const miles_traveled = parseInt(args[1], 10);
+    const total_receipts_amount = parseFloat(args[2]);
+
+    const result = calculateReimbursement(trip_duration_days, miles_traveled, total_receipts_amount);
+    console.log(result);
+}
+
+module.exports = { calculateReimbursement };
@@ -98,10 +98,14 @@ function calculateReimbursement(trip_duration_days, miles_traveled, total_receip
 // ==========================================
 // COMMAND LINE INTERFACE
 // ==========================================
-const args = process.argv.slice(2);
-const trip_duration_days = parseInt(args[0], 10);
-const miles_traveled = parseInt(args[1], 10);
-const total_receipts_amount = parseFloat(args[2]);
+if (require.main === module) {
+    const args = process.argv.slice(2);
+    const trip_duration_days = parseInt(args[0], 10);
+    const miles_traveled = parseInt(args[1], 10);
+    const total_receipts_amount = parseFloat(args[2]);
 
-const result = calculateReimbursement(trip_duration_days, miles_traveled, total_receipts_amount);
-console.log(result); 
\ No newline at end of file
+    const result = calculateReimbursement(trip_duration_days, miles_traveled, total_receipts_amount);
+    console.log(result);
+}
+
+module.exports = { calculateReimbursement }; 
\ No newline at end of file
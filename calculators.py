@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Batched access to reimbursement calculators.
+
+Every calculator exposes evaluate(durations, miles, receipts) and returns one
+output string per case, exactly as ./run.sh would print it ('ERROR' when a
+case fails). JS calculators are driven through a single long-lived
+batch_calculate.js process instead of one node spawn per case.
+"""
+import os
+import shutil
+import subprocess
+
+from reimbursement import PORTS, cli_args, parse_args
+from rule_engine import RuleSet
+
+BATCH_RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'batch_calculate.js')
+
+
+def format_case(duration, miles, receipts):
+    """Render one case the way the shell scripts pass it on the command line"""
+    return f"{duration} {miles!r} {receipts!r}"
+
+
+class JSCalculator:
+    """A calculate*.js module evaluated in batches over one node process"""
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self._process = None
+
+    def start(self):
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(['node', BATCH_RUNNER, self.path],
+                                             stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                             text=True, bufsize=1 << 20)
+        return self
+
+    def evaluate(self, durations, miles, receipts):
+        return self.evaluate_lines(list(map(format_case, durations, miles, receipts)))
+
+    def evaluate_lines(self, lines):
+        """Evaluate raw "days miles receipts" argument strings"""
+        if len(lines) == 0:
+            return []
+        self.start()
+        self._process.stdin.write('\n'.join(lines) + '\n\n')
+        self._process.stdin.flush()
+        outputs = []
+        for _ in range(len(lines)):
+            line = self._process.stdout.readline()
+            if not line:
+                raise RuntimeError(f"{self.name}: batch process exited unexpectedly")
+            outputs.append(line.strip())
+        return outputs
+
+    def close(self):
+        if self._process is not None:
+            self._process.stdin.close()
+            self._process.wait()
+            self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CommandCalculator:
+    """Any run.sh-style command, spawned once per case (slow but general)"""
+
+    def __init__(self, command):
+        self.command = command
+        self.name = os.path.basename(command)
+
+    def evaluate(self, durations, miles, receipts):
+        outputs = []
+        for case in map(format_case, durations, miles, receipts):
+            result = subprocess.run([self.command] + case.split(' '), capture_output=True, text=True)
+            output = ''.join(result.stdout.split())
+            outputs.append(output if result.returncode == 0 else 'ERROR')
+        return outputs
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PythonCalculator:
+    """An in-process Python port from reimbursement.py"""
+
+    def __init__(self, function, name=None):
+        self.function = function
+        self.name = name or function.__name__
+
+    def evaluate(self, durations, miles, receipts):
+        # Apply the CLI parsing so fractional miles truncate as they do in node
+        function = self.function
+        try:
+            return [function(*cli_args(d, m, r)) for d, m, r in zip(durations, miles, receipts)]
+        except Exception:
+            # Redo the batch case by case so only the failing cases become 'ERROR'
+            return [self._result(cli_args, case) for case in zip(durations, miles, receipts)]
+
+    def evaluate_lines(self, lines):
+        return [self._result(parse_args, line.split(' ')) for line in lines]
+
+    def _result(self, parse, arguments):
+        """One output, or 'ERROR' like a run.sh call that fails"""
+        try:
+            return self.function(*parse(*arguments))
+        except Exception:
+            return 'ERROR'
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def get_calculator(spec):
+    """Build a calculator from a spec.
+
+    'py:<engine>.js' selects the Python port of that engine, *.json rule
+    sets are compiled by rule_engine.py, other *.js modules are batched
+    through node, and anything else is spawned per case: a script path
+    (./run.sh or a bare run.sh) or a command on PATH.
+    """
+    if spec.startswith('py:'):
+        if spec[3:] not in PORTS:
+            raise ValueError(f"no Python port of {spec[3:]!r} (have: {', '.join(sorted(PORTS))})")
+        return PythonCalculator(PORTS[spec[3:]], spec)
+    if spec.endswith('.json'):
+        return RuleSet.load(spec)
+    if spec.endswith('.js'):
+        return JSCalculator(spec)
+    if os.path.isfile(spec):
+        return CommandCalculator(os.path.abspath(spec))
+    if shutil.which(spec) is None:
+        raise ValueError(f"no such calculator: {spec!r}")
+    return CommandCalculator(spec)
+
+
+def run_calculator(duration, miles, receipts, path='calculate.js'):
+    """One case through `node <path>`, as the standalone analysis scripts run it"""
+    result = subprocess.run(['node', path, str(duration), str(miles), str(receipts)],
+                            capture_output=True, text=True)
+    return float(result.stdout.strip())
+
+
+def evaluate_cases(calculator, cases):
+    """Run a calculator over a TripCases dataset"""
+    return calculator.evaluate(cases.durations, cases.miles, cases.receipts)
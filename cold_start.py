@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Build and measure the snapshot-based fast cold start used by run.sh.
+
+Every ./run.sh call boots a fresh node, then resolves, reads, parses and
+compiles the calculator and its engines before doing about fifty lines of
+arithmetic. fast_start.js captures a V8 startup snapshot with all of that
+already done; run.sh starts from it whenever calculator.blob is newer than
+every source it was built from, and falls back to the plain command
+otherwise (or if this node cannot load the blob).
+
+This script builds the blob, checks that it answers exactly like the plain
+command on fuzzed inputs, and benchmarks the launch paths as separate
+interleaved cold processes, so eval.sh's and generate_results.sh's
+per-invocation cost can be compared directly.
+
+Usage: python3 cold_start.py [--build] [--check 200] [--runs 50]
+"""
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import time
+
+from calculators import JSCalculator
+from fuzz_calculators import boundary_case, random_case
+
+SNAPSHOT_BLOB = 'calculator.blob'
+CALCULATOR = 'calculate_ensemble.js'
+# Sources baked into the blob; run.sh checks the blob is newer than each of these
+SNAPSHOT_SOURCES = ('fast_start.js', 'calculate_ensemble.js', 'ensemble_weights.json', 'calculate.js',
+                    'calculate_formula.js')
+
+
+def build_snapshot(calculator=CALCULATOR, blob=SNAPSHOT_BLOB):
+    """Write a startup snapshot of calculator to blob; returns the build time in seconds"""
+    started = time.perf_counter()
+    subprocess.run(['node', '--snapshot-blob', blob, '--build-snapshot', 'fast_start.js', calculator], check=True)
+    return time.perf_counter() - started
+
+
+def is_fresh(blob=SNAPSHOT_BLOB, sources=SNAPSHOT_SOURCES):
+    """Whether blob exists and is newer than every source, the test run.sh makes"""
+    if not os.path.exists(blob):
+        return False
+    built = os.path.getmtime(blob)
+    return all(os.path.getmtime(source) < built for source in sources if os.path.exists(source))
+
+
+def launch_paths(calculator=CALCULATOR, blob=SNAPSHOT_BLOB):
+    """{label: argv prefix} for each way of answering one case in a fresh process"""
+    return {
+        'node -e 0 (boot only)': ['node', '-e', '0'],
+        f'node {calculator}': ['node', calculator],
+        'node --snapshot-blob': ['node', '--snapshot-blob', blob, '--'],
+        './run.sh': ['./run.sh'],
+    }
+
+
+def run_once(command, case):
+    return subprocess.run(command + list(case), capture_output=True, text=True, check=True).stdout.strip()
+
+
+def check_snapshot(num_cases, seed=0, calculator=CALCULATOR, blob=SNAPSHOT_BLOB):
+    """Mismatches between the snapshot and the plain calculator on fuzzed cases"""
+    rng = random.Random(seed)
+    cases = [(random_case if index % 2 else boundary_case)(rng) for index in range(num_cases)]
+    with JSCalculator(calculator) as reference:
+        expected = reference.evaluate_lines([' '.join(case) for case in cases])
+    mismatches = []
+    for case, want in zip(cases, expected):
+        got = run_once(['node', '--snapshot-blob', blob, '--'], case)  # '--' so '-1' is not a node option
+        if got != want:
+            mismatches.append((case, want, got))
+    return mismatches
+
+
+def benchmark(paths, runs, case=('5', '250', '150.75')):
+    """{label: [milliseconds per run]}, running the paths round-robin so drift hits all alike"""
+    timings = {label: [] for label in paths}
+    for command in paths.values():
+        run_once(command, case)  # warm the OS file cache
+    for _ in range(runs):
+        for label, command in paths.items():
+            started = time.perf_counter()
+            subprocess.run(command + list(case), stdout=subprocess.DEVNULL, check=True)
+            timings[label].append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--build', action='store_true', help=f'(re)build {SNAPSHOT_BLOB} even if it is fresh')
+    parser.add_argument('--check', type=int, default=200, help='fuzzed cases to compare snapshot and plain output on')
+    parser.add_argument('--runs', type=int, default=50, help='cold starts per launch path')
+    args = parser.parse_args()
+
+    print("⚡ COLD START")
+    print("=" * 50)
+    if args.build or not is_fresh():
+        seconds = build_snapshot()
+        print(f"Built {SNAPSHOT_BLOB} from {CALCULATOR} in {seconds:.2f}s "
+              f"({os.path.getsize(SNAPSHOT_BLOB) / 1e6:.1f} MB)")
+    else:
+        print(f"{SNAPSHOT_BLOB} is newer than its sources; pass --build to rebuild")
+
+    if args.check:
+        mismatches = check_snapshot(args.check)
+        print(f"Snapshot vs {CALCULATOR} on {args.check} fuzzed cases: {len(mismatches)} mismatches")
+        for case, want, got in mismatches[:10]:
+            print(f"  {' '.join(case)}: expected {want}, snapshot {got}")
+
+    timings = benchmark(launch_paths(), args.runs)
+    baseline = statistics.median(timings[f'node {CALCULATOR}'])
+    print(f"\nLaunch path                    | Median ms | Mean ms |  Min ms | vs node {CALCULATOR}")
+    print("-" * 86)
+    for label, samples in timings.items():
+        median = statistics.median(samples)
+        print(f"{label:30s} | {median:9.1f} | {statistics.mean(samples):7.1f} | {min(samples):7.1f} | "
+              f"{median - baseline:+7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
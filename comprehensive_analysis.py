@@ -1,50 +1,27 @@
 #!/usr/bin/env python3
-import json
-import subprocess
 import statistics
 from collections import defaultdict
 
+from bootstrap import bootstrap, format_interval
+from calculators import run_calculator
+from trip_cases import load_public_cases
+
 def load_test_cases():
-    with open('public_cases.json', 'r') as f:
-        return json.load(f)
+    return load_public_cases()
 
-def analyze_error_patterns():
+def analyze_error_patterns(cases=None, current=None):
     """Identify patterns in our highest error cases"""
-    cases = load_test_cases()
+    if cases is None:
+        cases = load_test_cases()
     
     print("=== ERROR PATTERN ANALYSIS ===")
     print("Analyzing our worst performing cases to find systematic issues...\n")
     
-    results = []
-    for i, case in enumerate(cases):
-        duration = case['input']['trip_duration_days']
-        miles = case['input']['miles_traveled']
-        receipts = case['input']['total_receipts_amount']
-        expected = case['expected_output']
-        
-        # Get current result
-        result = subprocess.run(['node', 'calculate.js', str(duration), str(miles), str(receipts)], 
-                              capture_output=True, text=True)
-        current = float(result.stdout.strip())
-        error = abs(current - expected)
-        
-        results.append({
-            'case_id': i,
-            'duration': duration,
-            'miles': miles,
-            'receipts': receipts,
-            'expected': expected,
-            'current': current,
-            'error': error,
-            'miles_per_day': miles / duration,
-            'spending_per_day': receipts / duration,
-            'expected_per_day': expected / duration,
-            'current_per_day': current / duration,
-            'over_under': 'OVER' if current > expected else 'UNDER'
-        })
+    if current is None:
+        current = [run_calculator(case.duration, case.miles, case.receipts) for case in cases]
     
     # Sort by error magnitude
-    results.sort(key=lambda x: x['error'], reverse=True)
+    results = cases.with_current(current).sorted_by('error', reverse=True)
     
     # Analyze top 20 worst cases
     print("TOP 20 HIGHEST ERROR CASES:")
@@ -52,85 +29,104 @@ def analyze_error_patterns():
     print("-" * 85)
     
     for case in results[:20]:
-        print(f"{case['case_id']:4d} | {case['duration']:8d} | {case['miles']:5.0f} | {case['spending_per_day']:5.0f} | {case['expected']:8.2f} | {case['current']:7.2f} | {case['error']:5.0f} | {case['miles_per_day']:9.1f} | {case['over_under']}")
+        print(f"{case.case_id:4d} | {case.duration:8d} | {case.miles:5.0f} | {case.spending_per_day:5.0f} | {case.expected:8.2f} | {case.current:7.2f} | {case.error:5.0f} | {case.miles_per_day:9.1f} | {case.over_under}")
     
     return results
 
-def analyze_systematic_bias(results):
+def analyze_systematic_bias(results, resamples=10000):
     """Look for systematic patterns in over/under reimbursement"""
     print("\n=== SYSTEMATIC BIAS ANALYSIS ===")
     
     # Group by characteristics
-    by_duration = defaultdict(list)
-    by_receipt_level = defaultdict(list)
-    by_efficiency = defaultdict(list)
-    
-    for case in results:
-        # Group by duration
-        by_duration[case['duration']].append(case)
-        
-        # Group by receipt level
-        if case['receipts'] == 0:
-            by_receipt_level['None'].append(case)
-        elif case['receipts'] < 100:
-            by_receipt_level['Low'].append(case)
-        elif case['receipts'] < 500:
-            by_receipt_level['Medium'].append(case)
-        elif case['receipts'] < 1500:
-            by_receipt_level['High'].append(case)
-        else:
-            by_receipt_level['Very High'].append(case)
-        
-        # Group by efficiency
-        if case['miles_per_day'] < 50:
-            by_efficiency['Low'].append(case)
-        elif case['miles_per_day'] < 150:
-            by_efficiency['Medium'].append(case)
-        else:
-            by_efficiency['High'].append(case)
+    by_duration = results.group_by('duration')
+    by_receipt_level = results.group_by('receipts', receipt_level)
+    by_trip_length = results.group_by('duration', trip_length)
+    
+    # Bootstrap the error and signed bias of every bucket in one pass; keys are
+    # (statistic, grouping, group) since 'Medium' is both a receipt level and a length
+    buckets = {}
+    for grouping, groups in (('duration', by_duration), ('receipts', by_receipt_level), ('length', by_trip_length)):
+        for key, cases in groups.items():
+            buckets[('error', grouping, key)] = cases.errors
+            buckets[('bias', grouping, key)] = [current - expected for current, expected in zip(cases.current, cases.expected)]
+    intervals = bootstrap(buckets, resamples)
     
     # Analyze bias by duration
     print("BIAS BY DURATION:")
-    print("Duration | Count | Avg Error | % Over | % Under | Avg Expected | Avg Current")
-    print("-" * 75)
+    print("Duration | Count | Avg Error |     95% CI (Error) | % Over | % Under | Avg Expected | Avg Current |   95% CI (Cur - Exp)")
+    print("-" * 119)
     
     for duration in sorted(by_duration.keys()):
         cases = by_duration[duration]
         if len(cases) > 5:  # Only analyze with sufficient data
-            avg_error = statistics.mean([c['error'] for c in cases])
-            pct_over = len([c for c in cases if c['over_under'] == 'OVER']) / len(cases) * 100
-            pct_under = 100 - pct_over
-            avg_expected = statistics.mean([c['expected'] for c in cases])
-            avg_current = statistics.mean([c['current'] for c in cases])
-            
-            print(f"{duration:8d} | {len(cases):5d} | {avg_error:9.2f} | {pct_over:6.1f}% | {pct_under:7.1f}% | {avg_expected:12.2f} | {avg_current:11.2f}")
+            print_bias_row(f"{duration:8d}", cases, intervals, ('duration', duration))
     
     # Analyze bias by receipt level
     print("\nBIAS BY RECEIPT LEVEL:")
-    print("Level      | Count | Avg Error | % Over | % Under | Avg Expected | Avg Current")
-    print("-" * 75)
+    print("Level      | Count | Avg Error |     95% CI (Error) | % Over | % Under | Avg Expected | Avg Current |   95% CI (Cur - Exp)")
+    print("-" * 119)
     
     for level in ['None', 'Low', 'Medium', 'High', 'Very High']:
-        cases = by_receipt_level[level]
-        if len(cases) > 5:
-            avg_error = statistics.mean([c['error'] for c in cases])
-            pct_over = len([c for c in cases if c['over_under'] == 'OVER']) / len(cases) * 100
-            pct_under = 100 - pct_over
-            avg_expected = statistics.mean([c['expected'] for c in cases])
-            avg_current = statistics.mean([c['current'] for c in cases])
-            
-            print(f"{level:10s} | {len(cases):5d} | {avg_error:9.2f} | {pct_over:6.1f}% | {pct_under:7.1f}% | {avg_expected:12.2f} | {avg_current:11.2f}")
+        cases = by_receipt_level.get(level)
+        if cases is not None and len(cases) > 5:
+            print_bias_row(f"{level:10s}", cases, intervals, ('receipts', level))
+    
+    # Analyze bias by trip length, and how the lengths differ
+    print("\nBIAS BY TRIP LENGTH (Short 1-3 days, Medium 4-6, Long 7+):")
+    print("Length     | Count | Avg Error |     95% CI (Error) | % Over | % Under | Avg Expected | Avg Current |   95% CI (Cur - Exp)")
+    print("-" * 119)
+    
+    lengths = [length for length in ['Short', 'Medium', 'Long'] if length in by_trip_length]
+    for length in lengths:
+        print_bias_row(f"{length:10s}", by_trip_length[length], intervals, ('length', length))
+    for index, a in enumerate(lengths):
+        for b in lengths[index + 1:]:
+            error = intervals.difference(('error', 'length', a), ('error', 'length', b))
+            bias = intervals.difference(('bias', 'length', a), ('bias', 'length', b))
+            print(f"  {a} minus {b}: avg error {error.mean:+.2f} (95% CI {format_interval(error)}), "
+                  f"bias {bias.mean:+.2f} (95% CI {format_interval(bias)})")
+
+def trip_length(duration):
+    if duration <= 3:
+        return 'Short'
+    elif duration <= 6:
+        return 'Medium'
+    else:
+        return 'Long'
+
+def receipt_level(receipts):
+    if receipts == 0:
+        return 'None'
+    elif receipts < 100:
+        return 'Low'
+    elif receipts < 500:
+        return 'Medium'
+    elif receipts < 1500:
+        return 'High'
+    else:
+        return 'Very High'
+
+def print_bias_row(label, cases, intervals, key):
+    avg_error = statistics.mean(cases.errors)
+    pct_over = sum(1 for current, expected in zip(cases.current, cases.expected) if current > expected) / len(cases) * 100
+    pct_under = 100 - pct_over
+    avg_expected = statistics.mean(cases.expected)
+    avg_current = statistics.mean(cases.current)
+    error_ci = format_interval(intervals.mean(('error',) + key), 18)
+    bias_ci = format_interval(intervals.mean(('bias',) + key), 20)
+    
+    print(f"{label} | {len(cases):5d} | {avg_error:9.2f} | {error_ci} | {pct_over:6.1f}% | {pct_under:7.1f}% | {avg_expected:12.2f} | {avg_current:11.2f} | {bias_ci}")
 
 def analyze_spending_penalty_issues(results):
     """Analyze cases where spending penalties seem incorrect"""
     print("\n=== SPENDING PENALTY ANALYSIS ===")
     
     # Look for cases with high receipts but very different expected outcomes
-    high_receipt_cases = [case for case in results if case['receipts'] > 1000]
+    high_receipt_cases = results.where(receipts > 1000 for receipts in results.receipts)
     
     # Group by expected per-day rates despite high receipts
-    low_expected = [case for case in high_receipt_cases if case['expected_per_day'] < 150]
-    high_expected = [case for case in high_receipt_cases if case['expected_per_day'] > 250]
+    low_expected = high_receipt_cases.band('expected_per_day', high=150)
+    high_expected = high_receipt_cases.where(per_day > 250 for per_day in high_receipt_cases.expected_per_day)
     
     print(f"High receipt cases (>$1000): {len(high_receipt_cases)}")
     print(f"  - Low expected per day (<$150): {len(low_expected)}")
@@ -140,37 +136,37 @@ def analyze_spending_penalty_issues(results):
     print("Case | Duration | Miles | Receipts | $/Day | Expected | Current | Miles/Day | Spending/Day")
     print("-" * 90)
     
-    for case in sorted(low_expected, key=lambda x: x['error'], reverse=True)[:10]:
-        print(f"{case['case_id']:4d} | {case['duration']:8d} | {case['miles']:5.0f} | {case['receipts']:8.2f} | {case['spending_per_day']:5.0f} | {case['expected']:8.2f} | {case['current']:7.2f} | {case['miles_per_day']:9.1f} | {case['spending_per_day']:12.1f}")
+    for case in low_expected.sorted_by('error', reverse=True)[:10]:
+        print(f"{case.case_id:4d} | {case.duration:8d} | {case.miles:5.0f} | {case.receipts:8.2f} | {case.spending_per_day:5.0f} | {case.expected:8.2f} | {case.current:7.2f} | {case.miles_per_day:9.1f} | {case.spending_per_day:12.1f}")
     
     print("\nHIGH EXPECTED CASES (should get good reimbursement despite high receipts):")
     print("Case | Duration | Miles | Receipts | $/Day | Expected | Current | Miles/Day | Spending/Day")
     print("-" * 90)
     
-    for case in sorted(high_expected, key=lambda x: x['error'], reverse=True)[:10]:
-        print(f"{case['case_id']:4d} | {case['duration']:8d} | {case['miles']:5.0f} | {case['receipts']:8.2f} | {case['spending_per_day']:5.0f} | {case['expected']:8.2f} | {case['current']:7.2f} | {case['miles_per_day']:9.1f} | {case['spending_per_day']:12.1f}")
+    for case in high_expected.sorted_by('error', reverse=True)[:10]:
+        print(f"{case.case_id:4d} | {case.duration:8d} | {case.miles:5.0f} | {case.receipts:8.2f} | {case.spending_per_day:5.0f} | {case.expected:8.2f} | {case.current:7.2f} | {case.miles_per_day:9.1f} | {case.spending_per_day:12.1f}")
 
 def identify_improvement_opportunities(results):
     """Identify the highest-impact improvement opportunities"""
     print("\n=== IMPROVEMENT OPPORTUNITIES ===")
     
     # Calculate potential score improvement by fixing different categories
-    total_error = sum([case['error'] for case in results])
+    total_error = sum(results.errors)
     
     # Categories of cases that could be improved
-    over_cases = [case for case in results if case['over_under'] == 'OVER']
-    under_cases = [case for case in results if case['over_under'] == 'UNDER']
+    over_cases = results.where(current > expected for current, expected in zip(results.current, results.expected))
+    under_cases = results.where(current <= expected for current, expected in zip(results.current, results.expected))
     
-    high_error_cases = [case for case in results if case['error'] > 500]
+    high_error_cases = results.where(error > 500 for error in results.errors)
     
     print(f"Current total error: ${total_error:.2f}")
     print(f"Average error per case: ${total_error/len(results):.2f}")
     print()
     
     print("ERROR DISTRIBUTION:")
-    print(f"  Over-reimbursing: {len(over_cases)} cases, total error: ${sum([c['error'] for c in over_cases]):.2f}")
-    print(f"  Under-reimbursing: {len(under_cases)} cases, total error: ${sum([c['error'] for c in under_cases]):.2f}")
-    print(f"  High error (>$500): {len(high_error_cases)} cases, total error: ${sum([c['error'] for c in high_error_cases]):.2f}")
+    print(f"  Over-reimbursing: {len(over_cases)} cases, total error: ${sum(over_cases.errors):.2f}")
+    print(f"  Under-reimbursing: {len(under_cases)} cases, total error: ${sum(under_cases.errors):.2f}")
+    print(f"  High error (>$500): {len(high_error_cases)} cases, total error: ${sum(high_error_cases.errors):.2f}")
     
     # Most common characteristics of high-error cases
     print(f"\nHIGH ERROR CASE PATTERNS:")
@@ -178,11 +174,11 @@ def identify_improvement_opportunities(results):
     receipt_patterns = defaultdict(int)
     
     for case in high_error_cases:
-        duration_counts[case['duration']] += 1
+        duration_counts[case.duration] += 1
         
-        if case['receipts'] > 1500:
+        if case.receipts > 1500:
             receipt_patterns['Very High Receipts'] += 1
-        elif case['receipts'] > 500:
+        elif case.receipts > 500:
             receipt_patterns['High Receipts'] += 1
         else:
             receipt_patterns['Low/Medium Receipts'] += 1
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Region-weighted blend of several reimbursement engines.
+
+Trips are split into regions by bins of (D, miles_per_day, spending_per_day).
+Every engine is evaluated once over the public cases, in batch, and each
+region then gets the convex blend of engine outputs that minimises its total
+absolute error; sparse regions fall back to the global blend. The learned
+weights are written to ensemble_weights.json, which calculate_ensemble.js
+reads to serve the same blend through run.sh, evaluating only the engines a
+trip's region actually weights.
+
+Usage: python3 ensemble.py [--engine calculate.js --engine calculate_formula.js] [--write]
+"""
+import argparse
+import itertools
+import json
+import random
+
+from calculators import evaluate_cases, get_calculator
+from reimbursement import cli_args, js_to_fixed_2, parse_args
+from scoring import VALID_OUTPUT, score_outputs
+from trip_cases import load_public_cases
+
+WEIGHTS_FILE = 'ensemble_weights.json'
+DEFAULT_ENGINES = ('calculate.js', 'calculate_formula.js')
+
+# Region bins: a value's bin is the number of edges it has reached
+DEFAULT_EDGES = {
+    'D': [2, 4, 7, 10],
+    'miles_per_day': [50, 100, 180, 220, 400],
+    'spending_per_day': [50, 100, 200, 350, 440, 800],
+}
+
+
+def region_of(edges, D, M, R):
+    """Region key "d,m,s" of one trip, from the values the JS CLI parses"""
+    return ','.join(str(bin_of(edges[feature], value))
+                    for feature, value in (('D', D), ('miles_per_day', M / D), ('spending_per_day', R / D)))
+
+
+def bin_of(edges, value):
+    """Number of leading edges <= value, written like the JS loop so NaN lands in bin 0 in both"""
+    index = 0
+    while index < len(edges) and value >= edges[index]:
+        index += 1
+    return index
+
+
+def blend(weights, values):
+    """Weighted sum in engine order, the same operations calculate_ensemble.js performs"""
+    total = 0
+    for weight, value in zip(weights, values):
+        if weight:
+            total += weight * value
+    return total
+
+
+def simplex_grid(num_engines, steps):
+    """Every weight vector with entries in multiples of 1/steps that sum to 1"""
+    for split in itertools.product(range(steps + 1), repeat=num_engines - 1):
+        if sum(split) <= steps:
+            counts = split + (steps - sum(split),)
+            yield tuple(count / steps for count in counts)
+
+
+def best_weights(rows, expected, candidates):
+    """The candidate weight vector with the smallest total absolute error over rows"""
+    return min(candidates, key=lambda weights: sum(abs(blend(weights, values) - target)
+                                                   for values, target in zip(rows, expected)))
+
+
+def learn_weights(regions, engine_values, expected, steps=20, min_cases=8):
+    """({region: weights}, global weights) learned from per-case engine values"""
+    candidates = list(simplex_grid(len(engine_values[0]), steps))
+    global_weights = best_weights(engine_values, expected, candidates)
+    by_region = {}
+    for index, region in enumerate(regions):
+        by_region.setdefault(region, []).append(index)
+    weights = {}
+    for region, rows in sorted(by_region.items()):
+        if len(rows) >= min_cases:
+            weights[region] = best_weights([engine_values[row] for row in rows],
+                                           [expected[row] for row in rows], candidates)
+    return weights, global_weights
+
+
+class Ensemble:
+    """Region-weighted blend of engines, usable anywhere a calculator is expected"""
+
+    def __init__(self, engines, edges, weights, default_weights, name='ensemble'):
+        self.engines = list(engines)
+        self.edges = edges
+        self.weights = weights
+        self.default_weights = tuple(default_weights)
+        self.name = name
+        self._calculators = None
+
+    @classmethod
+    def load(cls, path=WEIGHTS_FILE):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls(data['engines'], data['edges'], {region: tuple(weights) for region, weights in data['weights'].items()},
+                   data['default_weights'], path)
+
+    def to_dict(self):
+        return {
+            'engines': self.engines,
+            'edges': self.edges,
+            'default_weights': list(self.default_weights),
+            'weights': {region: list(weights) for region, weights in sorted(self.weights.items())},
+        }
+
+    def save(self, path=WEIGHTS_FILE):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write('\n')
+
+    def weights_for(self, region):
+        return self.weights.get(region, self.default_weights)
+
+    def combine(self, parsed, engine_outputs):
+        """Blend per-engine output strings for parsed (D, M, R) cases into ensemble output strings"""
+        results = []
+        for (D, M, R), outputs in zip(parsed, zip(*engine_outputs)):
+            weights = self.weights_for(region_of(self.edges, D, M, R))
+            if any(weight and not VALID_OUTPUT.match(output) for weight, output in zip(weights, outputs)):
+                results.append('ERROR')  # a weighted member failed on this case
+                continue
+            results.append(js_to_fixed_2(blend(weights, [float(output) if weight else 0
+                                                         for weight, output in zip(weights, outputs)])))
+        return results
+
+    def _engines(self):
+        if self._calculators is None:
+            self._calculators = [get_calculator(engine) for engine in self.engines]
+        return self._calculators
+
+    def evaluate(self, durations, miles, receipts):
+        engine_outputs = [calculator.evaluate(durations, miles, receipts) for calculator in self._engines()]
+        return self.combine(map(cli_args, durations, miles, receipts), engine_outputs)
+
+    def evaluate_lines(self, lines):
+        engine_outputs = [calculator.evaluate_lines(lines) for calculator in self._engines()]
+        return self.combine((parse_args(*line.split(' ')) for line in lines), engine_outputs)
+
+    def close(self):
+        for calculator in self._calculators or []:
+            calculator.close()
+        self._calculators = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def fit_ensemble(cases, engines, engine_outputs, edges=DEFAULT_EDGES, steps=20, min_cases=8):
+    """Ensemble learned from precomputed engine outputs over cases"""
+    regions = [region_of(edges, *parsed) for parsed in map(cli_args, cases.durations, cases.miles, cases.receipts)]
+    engine_values = [tuple(map(float, outputs)) for outputs in zip(*engine_outputs)]
+    weights, default_weights = learn_weights(regions, engine_values, list(cases.expected), steps, min_cases)
+    return Ensemble(engines, edges, weights, default_weights)
+
+
+def cross_validate(cases, engines, engine_outputs, folds=5, seed=0, **options):
+    """Held-out ensemble outputs for every case, from k-fold cross-validation"""
+    order = list(range(len(cases)))
+    random.Random(seed).shuffle(order)
+    held_out = [None] * len(cases)
+    for fold in range(folds):
+        test = order[fold::folds]
+        test_set = set(test)
+        train = [row for row in range(len(cases)) if row not in test_set]
+        model = fit_ensemble(cases.take(train), engines, [[outputs[row] for row in train] for outputs in engine_outputs],
+                             **options)
+        test_cases = cases.take(test)
+        blended = model.combine(map(cli_args, test_cases.durations, test_cases.miles, test_cases.receipts),
+                                [[outputs[row] for row in test] for outputs in engine_outputs])
+        for row, output in zip(test, blended):
+            held_out[row] = output
+    return held_out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--engine', action='append', help='engine to blend (default: calculate.js and calculate_formula.js)')
+    parser.add_argument('--steps', type=int, default=20, help='weight grid resolution (1/steps)')
+    parser.add_argument('--min-cases', type=int, default=8, help='smallest region that gets its own weights')
+    parser.add_argument('--folds', type=int, default=5, help='cross-validation folds for the held-out score')
+    parser.add_argument('--write', action='store_true', help=f'write the learned weights to {WEIGHTS_FILE}')
+    args = parser.parse_args()
+
+    engines = args.engine or list(DEFAULT_ENGINES)
+    cases = load_public_cases()
+    engine_outputs = []
+    for engine in engines:
+        with get_calculator(engine) as calculator:
+            engine_outputs.append(evaluate_cases(calculator, cases))
+
+    options = {'steps': args.steps, 'min_cases': args.min_cases}
+    model = fit_ensemble(cases, engines, engine_outputs, **options)
+    fitted = model.combine(map(cli_args, cases.durations, cases.miles, cases.receipts), engine_outputs)
+    held_out = cross_validate(cases, engines, engine_outputs, args.folds, **options)
+
+    print("🧪 REGION-WEIGHTED ENSEMBLE")
+    print("=" * 50)
+    print(f"{len(model.weights)} regions with their own weights, global weights "
+          + ', '.join(f"{engine} {weight:.2f}" for engine, weight in zip(engines, model.default_weights)) + "\n")
+    print("Model                                   | Exact | Close | Avg Error |    Score")
+    print("-" * 80)
+    rows = [(engine, outputs) for engine, outputs in zip(engines, engine_outputs)]
+    rows += [('ensemble (fitted on all cases)', fitted), (f'ensemble ({args.folds}-fold held out)', held_out)]
+    for label, outputs in rows:
+        summary = score_outputs(outputs, cases.expected)
+        print(f"{label:39s} | {summary['exact_matches']:5d} | {summary['close_matches']:5d} | "
+              f"{summary['avg_error']:9.2f} | {summary['score']:8.2f}")
+
+    if args.write:
+        model.save()
+        print(f"\nWrote {WEIGHTS_FILE}")
+
+
+if __name__ == "__main__":
+    main()
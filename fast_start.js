@@ -0,0 +1,57 @@
+// ==========================================
+// STARTUP SNAPSHOT ENTRY POINT
+// ==========================================
+// Builds a V8 startup snapshot with a calculator already loaded, compiled and
+// warmed up, so a cold `node --snapshot-blob` call skips module resolution,
+// file reads, JSON parsing and compilation and goes straight to the
+// arithmetic. The snapshot's main function is the minimal bootstrap: parse
+// argv exactly like the calculators' own CLI and print one result.
+//
+// --build-snapshot only offers built-in modules to require(), so the
+// calculator and the files it requires are loaded here with fs and a small
+// CommonJS shim before the heap is serialised.
+//
+// Build:  node --snapshot-blob calculator.blob --build-snapshot fast_start.js [calculator.js]
+// Run:    node --snapshot-blob calculator.blob <trip_duration_days> <miles_traveled> <total_receipts_amount>
+// (cold_start.py builds, checks and benchmarks this for run.sh)
+
+const fs = require('fs');
+const path = require('path');
+const v8 = require('v8');
+
+const modules = {};
+
+function load(file) {
+    if (!modules[file]) {
+        const module = { exports: {} };
+        modules[file] = module;
+        const source = fs.readFileSync(file, 'utf8');
+        if (file.endsWith('.json')) {
+            module.exports = JSON.parse(source);
+        } else {
+            const dirname = path.dirname(file);
+            const localRequire = (request) => (request.startsWith('.') || path.isAbsolute(request)
+                ? load(path.resolve(dirname, request)) : require(request));
+            new Function('module', 'exports', 'require', '__dirname', '__filename', source)(
+                module, module.exports, localRequire, dirname, file);
+        }
+    }
+    return modules[file].exports;
+}
+
+const calculatorPath = path.resolve(process.argv[2] || 'calculate_ensemble.js');
+const { calculateReimbursement } = load(calculatorPath);
+
+// Touch every path once so lazily loaded engines are in the snapshot too
+for (const [days, miles, receipts] of [[1, 1000, 50], [3, 100, 400.49], [5, 250, 150.75], [8, 50, 2000], [14, 900, 1100.99]]) {
+    calculateReimbursement(days, miles, receipts);
+}
+
+v8.startupSnapshot.setDeserializeMainFunction(() => {
+    // Without a script argument the trip inputs start at argv[1]
+    const trip_duration_days = parseInt(process.argv[1], 10);
+    const miles_traveled = parseInt(process.argv[2], 10);
+    const total_receipts_amount = parseFloat(process.argv[3]);
+
+    console.log(calculateReimbursement(trip_duration_days, miles_traveled, total_receipts_amount));
+});
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Differential fuzzer between the JS calculators and their Python ports.
+
+Generates random and boundary-hugging (D, M, R) argument strings, including
+zero days, negative, NaN and Infinity arguments, sends them
+to each JS engine in large batches over one long-lived node process, compares
+every result with the Python port from reimbursement.py (or any other
+candidate calculator, such as a rule set), and shrinks any mismatch to a
+minimal reproducing case.
+
+Usage: python3 fuzz_calculators.py [--cases N] [--engine calculate.js] [--candidate calculate_rules.json]
+"""
+import argparse
+import math
+import random
+import time
+
+from calculators import JSCalculator, PythonCalculator, get_calculator
+from reimbursement import PORTS, RECEIPT_CAP_BANDS, FORMULA_CONSTANTS, js_parse_float, js_parse_int
+
+# Thresholds the engines branch on, used to aim inputs at branch edges
+MILES_PER_DAY_EDGES = [50, 100, 150, 180, 200, 220, 300, 350, 400, 600]
+SPENDING_PER_DAY_EDGES = [12, 100, 180, 200, 250, 300, 350, 400, 440, 800, 1500]
+MILEAGE_EDGES = [50, 100, 200, 300, 500, 600, 700, 1000] + [band[1] for band in RECEIPT_CAP_BANDS]
+RECEIPT_EDGES = [30, 150, 500, 1000, 1500, FORMULA_CONSTANTS['RECEIPT_CAP_LOWER'],
+                 FORMULA_CONSTANTS['RECEIPT_CAP_UPPER']] + [band[2] for band in RECEIPT_CAP_BANDS]
+CENT_ENDINGS = [0, 1, 48, 49, 50, 51, 98, 99]
+# Arguments outside the historical ranges: division by zero, negatives, NaN, Infinity and huge values
+EDGE_ARGUMENTS = (
+    ['0', '-0', '-1', '-8', 'abc', '100000000000000000000000'],
+    ['0', '-1', '-250', 'abc', '1e21'],
+    ['0', '-0.49', '-150.75', 'Infinity', '-Infinity', 'NaN', 'abc', '1e21', '1e300'],
+)
+
+
+def format_money(value):
+    return f"{max(value, 0):.2f}".rstrip('0').rstrip('.') or '0'
+
+
+def random_case(rng):
+    """One uniformly random case in (and slightly beyond) the historical ranges"""
+    days = rng.randint(1, 20)
+    if rng.random() < 0.2:
+        miles = format_money(rng.uniform(0, 1500))
+    else:
+        miles = str(rng.randint(0, 1500))
+    receipts = format_money(rng.uniform(0, 3000))
+    return str(days), miles, receipts
+
+
+def boundary_case(rng):
+    """A case placed on, or one step either side of, a branch threshold"""
+    days = rng.randint(1, 16)
+    miles = rng.randint(0, 1500)
+    receipts = rng.uniform(0, 3000)
+    nudge = rng.choice((-1, 0, 1))
+    target = rng.randrange(4)
+    if target == 0:
+        miles = rng.choice(MILES_PER_DAY_EDGES) * days + nudge
+    elif target == 1:
+        receipts = rng.choice(SPENDING_PER_DAY_EDGES) * days + nudge * 0.01
+    elif target == 2:
+        miles = rng.choice(MILEAGE_EDGES) + nudge
+    else:
+        receipts = rng.choice(RECEIPT_EDGES) + nudge * 0.01
+    if rng.random() < 0.5:
+        receipts = int(receipts) + rng.choice(CENT_ENDINGS) / 100
+    case = [str(days), str(max(miles, 0)), format_money(receipts)]
+    if rng.random() < 0.1:
+        argument = rng.randrange(3)
+        case[argument] = rng.choice(EDGE_ARGUMENTS[argument])
+    return tuple(case)
+
+
+def generate_cases(rng, count, boundary_fraction=0.5):
+    return [boundary_case(rng) if rng.random() < boundary_fraction else random_case(rng)
+            for _ in range(count)]
+
+
+def mismatches(js, port, cases):
+    """(index, JS result, Python result) for every case where the two differ"""
+    lines = [' '.join(case) for case in cases]
+    expected = js.evaluate_lines(lines)
+    actual = port.evaluate_lines(lines)
+    return [(i, expected[i], actual[i]) for i in range(len(lines)) if expected[i] != actual[i]]
+
+
+def magnitude(value):
+    """Size of a parsed argument for shrinking; NaN and the infinities are the largest"""
+    return abs(value) if math.isfinite(value) else math.inf
+
+
+def case_size(case):
+    """Shrink order: fewer days, then shorter and smaller miles, then receipts"""
+    days, miles, receipts = case
+    return (magnitude(js_parse_int(days)), len(miles), magnitude(js_parse_float(miles)), len(receipts),
+            magnitude(js_parse_float(receipts)))
+
+
+def shrink_candidates(case):
+    """Simpler variants of a case: fewer days, rounder and smaller numbers"""
+    days, miles, receipts = case
+    d, m, r = js_parse_int(days), js_parse_float(miles), js_parse_float(receipts)
+    for new_days in ((1, d // 2, d - 1) if math.isfinite(d) else (1,)):
+        yield str(max(int(new_days), 1)), miles, receipts
+    for new_miles in ((0, int(m), m // 2, m - 1) if math.isfinite(m) else (0,)):
+        yield days, format_money(new_miles), receipts
+    for new_receipts in ((0, round(r), round(r, 1), r // 2, r - 1, r - 0.01) if math.isfinite(r) else (0,)):
+        yield days, miles, format_money(new_receipts)
+
+
+def shrink(js, port, case):
+    """Greedily simplify a mismatching case while it keeps mismatching"""
+    improved = True
+    while improved:
+        improved = False
+        for candidate in shrink_candidates(case):
+            if case_size(candidate) < case_size(case) and mismatches(js, port, [candidate]):
+                case = candidate
+                improved = True
+                break
+    return case
+
+
+def fuzz_engine(engine, cases_total, batch_size, rng, candidate=None, max_reports=10):
+    js = JSCalculator(engine)
+    port = get_calculator(candidate) if candidate else PythonCalculator(PORTS[engine], 'py:' + engine)
+    found = []
+    checked = 0
+    started = time.time()
+    try:
+        while checked < cases_total:
+            cases = generate_cases(rng, min(batch_size, cases_total - checked))
+            for i, expected, actual in mismatches(js, port, cases):
+                if len(found) < max_reports:
+                    minimal = shrink(js, port, cases[i])
+                    _, expected, actual = mismatches(js, port, [minimal])[0]
+                    found.append((cases[i], minimal, expected, actual))
+                else:
+                    found.append((cases[i], None, expected, actual))
+            checked += len(cases)
+            print(f"  {engine}: {checked}/{cases_total} cases checked, {len(found)} mismatches...")
+    finally:
+        js.close()
+    return found, time.time() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', type=int, default=1_000_000, help='cases per engine')
+    parser.add_argument('--batch-size', type=int, default=100_000)
+    parser.add_argument('--engine', action='append', choices=sorted(PORTS),
+                        help='engine to fuzz (repeatable, default: all)')
+    parser.add_argument('--candidate', default=None,
+                        help='calculator spec to compare instead of the Python port (e.g. calculate_rules.json)')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    if args.candidate and len(args.engine or []) != 1:
+        parser.error('--candidate needs exactly one --engine to compare against')
+
+    seed = args.seed if args.seed is not None else random.randrange(1 << 32)
+    rng = random.Random(seed)
+    engines = args.engine or sorted(PORTS)
+
+    print("🔬 DIFFERENTIAL FUZZING: JS ENGINES vs PYTHON PORTS")
+    print("=" * 50)
+    print(f"Seed: {seed}\n")
+
+    failed = False
+    for engine in engines:
+        found, elapsed = fuzz_engine(engine, args.cases, args.batch_size, rng, args.candidate)
+        rate = args.cases / elapsed if elapsed else 0
+        print(f"\n{engine}: {args.cases} cases in {elapsed:.1f}s ({rate:,.0f} cases/s)")
+        if not found:
+            print(f"✓ {args.candidate or 'Python port'} matches the JS engine on every case")
+            continue
+        failed = True
+        print(f"✗ {len(found)} mismatches")
+        print("Original (D M R)            | Minimal (D M R)             | JS       | Python (minimal case)")
+        print("-" * 80)
+        for original, minimal, expected, actual in found[:10]:
+            minimal_text = ' '.join(minimal) if minimal else '-'
+            print(f"{' '.join(original):27s} | {minimal_text:27s} | {expected:8s} | {actual}")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@
 
 # Black Box Challenge - Results Generation Script
 # This script runs your implementation against test cases and outputs results to private_results.txt
+# Results are built in resumable chunks and recorded in private_results.manifest so that
+# an interrupted run picks up where it left off and an unchanged rerun is skipped.
 
 set -e
 
@@ -38,8 +40,65 @@ if [ ! -f "private_cases.json" ]; then
     exit 1
 fi
 
+# Output, manifest and checkpoint locations
+RESULTS_FILE="private_results.txt"
+MANIFEST_FILE="private_results.manifest"
+CHECKPOINT_ROOT=".private_results.partial"
+CHUNK_SIZE=${CHUNK_SIZE:-100}
+
+if ! [[ $CHUNK_SIZE =~ ^[1-9][0-9]*$ ]]; then
+    echo "❌ Error: CHUNK_SIZE must be a positive integer, not '$CHUNK_SIZE'"
+    exit 1
+fi
+
+FORCE=0
+if [ "$1" = "--force" ]; then
+    FORCE=1
+fi
+
+# Portable SHA-256 of stdin (sha256sum on Linux, shasum on macOS)
+sha256_stdin() {
+    if command -v sha256sum &> /dev/null; then
+        sha256sum | cut -d' ' -f1
+    else
+        shasum -a 256 | cut -d' ' -f1
+    fi
+}
+
+# The calculator is run.sh plus every source file it invokes, and the engines
+# and data files those sources load (e.g. calculate_ensemble.js)
+calculator_hash() {
+    local files=("run.sh")
+    local ref
+    for ref in $(grep -v '^[[:space:]]*#' run.sh | grep -oE '[A-Za-z0-9_./-]+\.(js|py|sh)' | sort -u); do
+        if [ -f "$ref" ]; then
+            files+=("$ref")
+        fi
+    done
+    local i
+    for ((i = 1; i < ${#files[@]}; i++)); do
+        for ref in $(grep -oE '[A-Za-z0-9_./-]+\.(js|json)' "${files[$i]}" | sort -u); do
+            if [ -f "$ref" ] && [[ " ${files[*]} " != *" $ref "* ]]; then
+                files+=("$ref")
+            fi
+        done
+    done
+    local f
+    for f in "${files[@]}"; do
+        echo "== $f"
+        cat "$f"
+    done | sha256_stdin
+}
+
+manifest_value() {
+    grep "^$1=" "$MANIFEST_FILE" 2>/dev/null | cut -d'=' -f2
+}
+
+calculator_sha=$(calculator_hash)
+cases_sha=$(sha256_stdin < private_cases.json)
+
 echo "📊 Processing test cases and generating results..."
-echo "📝 Output will be saved to private_results.txt"
+echo "📝 Output will be saved to $RESULTS_FILE"
 echo
 
 # Extract all test data upfront in a single jq call for better performance
@@ -53,41 +112,129 @@ while IFS= read -r line; do
 done <<< "$test_data"
 total_cases=${#test_cases[@]}
 
-# Remove existing results file if it exists
-rm -f private_results.txt
+# Skip the run entirely if the manifest shows nothing has changed
+if [ $FORCE -eq 0 ] && [ -f "$RESULTS_FILE" ] && [ -f "$MANIFEST_FILE" ]; then
+    if [ "$(manifest_value calculator_sha256)" = "$calculator_sha" ] && \
+       [ "$(manifest_value cases_sha256)" = "$cases_sha" ] && \
+       [ "$(manifest_value case_count)" = "$total_cases" ] && \
+       [ "$(manifest_value output_sha256)" = "$(sha256_stdin < "$RESULTS_FILE")" ]; then
+        echo "✅ $RESULTS_FILE is up to date with run.sh and private_cases.json (use --force to regenerate)" >&2
+        exit 0
+    fi
+fi
+
+# Checkpoints are keyed by calculator, cases and chunk size so stale chunks are never reused
+checkpoint_dir="$CHECKPOINT_ROOT/${calculator_sha:0:16}-${cases_sha:0:16}-$CHUNK_SIZE"
+if [ -d "$CHECKPOINT_ROOT" ]; then
+    for stale in "$CHECKPOINT_ROOT"/*; do
+        if [ -e "$stale" ] && [ "$stale" != "$checkpoint_dir" ]; then
+            rm -rf "$stale"
+        fi
+    done
+fi
+mkdir -p "$checkpoint_dir"
+
+echo "Processing $total_cases test cases in chunks of $CHUNK_SIZE..." >&2
 
-echo "Processing $total_cases test cases..." >&2
+# Process each chunk, resuming from any chunks completed by an earlier run
+resumed_chunks=0
+failed_chunks=0
+chunk_files=()
+for ((chunk_start=0; chunk_start<total_cases; chunk_start+=CHUNK_SIZE)); do
+    chunk_end=$((chunk_start + CHUNK_SIZE))
+    if [ $chunk_end -gt $total_cases ]; then
+        chunk_end=$total_cases
+    fi
+    chunk_file=$(printf "%s/chunk_%06d.txt" "$checkpoint_dir" "$chunk_start")
+    chunk_files+=("$chunk_file")
+
+    if [ -f "$chunk_file" ] && [ "$(wc -l < "$chunk_file" | tr -d '[:space:]')" -eq $((chunk_end - chunk_start)) ]; then
+        resumed_chunks=$((resumed_chunks + 1))
+        continue
+    fi
 
-# Process each test case
-for ((i=0; i<total_cases; i++)); do
-    if [ $((i % 100)) -eq 0 ] && [ $i -gt 0 ]; then
-        echo "Progress: $i/$total_cases cases processed..." >&2
+    if [ $chunk_start -gt 0 ]; then
+        echo "Progress: $chunk_start/$total_cases cases processed..." >&2
     fi
-    
-    # Extract test case data from pre-loaded array
-    IFS=':' read -r trip_duration miles_traveled receipts_amount <<< "${test_cases[i]}"
-    
-    # Run the user's implementation
-    if script_output=$(./run.sh "$trip_duration" "$miles_traveled" "$receipts_amount" 2>/dev/null); then
-        # Check if output is a valid number
-        output=$(echo "$script_output" | tr -d '[:space:]')
-        if [[ $output =~ ^-?[0-9]+\.?[0-9]*$ ]]; then
-            echo "$output" >> private_results.txt
+
+    : > "$chunk_file.tmp"
+    for ((i=chunk_start; i<chunk_end; i++)); do
+        # Extract test case data from pre-loaded array
+        IFS=':' read -r trip_duration miles_traveled receipts_amount <<< "${test_cases[i]}"
+
+        # Run the user's implementation
+        if script_output=$(./run.sh "$trip_duration" "$miles_traveled" "$receipts_amount" 2>/dev/null); then
+            # Check if output is a valid number
+            output=$(echo "$script_output" | tr -d '[:space:]')
+            if [[ $output =~ ^-?[0-9]+\.?[0-9]*$ ]]; then
+                echo "$output" >> "$chunk_file.tmp"
+            else
+                echo "Error on case $((i+1)): Invalid output format: $output" >&2
+                echo "ERROR" >> "$chunk_file.tmp"
+            fi
         else
-            echo "Error on case $((i+1)): Invalid output format: $output" >&2
-            echo "ERROR" >> private_results.txt
+            # Capture stderr for error reporting
+            error_msg=$(./run.sh "$trip_duration" "$miles_traveled" "$receipts_amount" 2>&1 >/dev/null | tr -d '\n')
+            echo "Error on case $((i+1)): Script failed: $error_msg" >&2
+            echo "ERROR" >> "$chunk_file.tmp"
         fi
+    done
+
+    # A chunk only counts as done once it has been renamed into place; chunks
+    # with failed cases are kept aside so the next run retries them
+    if grep -qx 'ERROR' "$chunk_file.tmp"; then
+        mv "$chunk_file.tmp" "$chunk_file.failed"
+        failed_chunks=$((failed_chunks + 1))
     else
-        # Capture stderr for error reporting
-        error_msg=$(./run.sh "$trip_duration" "$miles_traveled" "$receipts_amount" 2>&1 >/dev/null | tr -d '\n')
-        echo "Error on case $((i+1)): Script failed: $error_msg" >&2
-        echo "ERROR" >> private_results.txt
+        rm -f "$chunk_file.failed"
+        mv "$chunk_file.tmp" "$chunk_file"
     fi
 done
 
+if [ $resumed_chunks -gt 0 ]; then
+    echo "Resumed $resumed_chunks completed chunk(s) from a previous run" >&2
+fi
+
+# Assemble exactly the chunks of this run, in order, and atomically replace the results file
+for chunk_file in "${chunk_files[@]}"; do
+    if [ -f "$chunk_file" ]; then
+        cat "$chunk_file"
+    else
+        cat "$chunk_file.failed"
+    fi
+done > "$RESULTS_FILE.tmp"
+
+assembled_lines=$(wc -l < "$RESULTS_FILE.tmp" | tr -d '[:space:]')
+if [ "$assembled_lines" -ne "$total_cases" ]; then
+    rm -f "$RESULTS_FILE.tmp"
+    echo "❌ Error: assembled $assembled_lines results for $total_cases cases; $RESULTS_FILE left unchanged" >&2
+    exit 1
+fi
+mv "$RESULTS_FILE.tmp" "$RESULTS_FILE"
+
+# Failed cases are written as ERROR lines, but the run is not recorded as complete
+if [ $failed_chunks -gt 0 ]; then
+    rm -f "$MANIFEST_FILE"
+    echo >&2
+    echo "⚠️  $failed_chunks chunk(s) contain ERROR lines; no manifest was written." >&2
+    echo "   Rerun ./generate_results.sh to retry only those chunks." >&2
+    exit 1
+fi
+
+{
+    echo "calculator_sha256=$calculator_sha"
+    echo "cases_sha256=$cases_sha"
+    echo "case_count=$total_cases"
+    echo "output_sha256=$(sha256_stdin < "$RESULTS_FILE")"
+} > "$MANIFEST_FILE.tmp"
+mv "$MANIFEST_FILE.tmp" "$MANIFEST_FILE"
+
+rm -rf "$checkpoint_dir"
+rmdir "$CHECKPOINT_ROOT" 2>/dev/null || true
+
 echo
 echo "✅ Results generated successfully!" >&2
-echo "📄 Output saved to private_results.txt" >&2
+echo "📄 Output saved to $RESULTS_FILE (manifest: $MANIFEST_FILE)" >&2
 echo "📊 Each line contains the result for the corresponding test case in private_cases.json" >&2
 
 echo
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Test bench for the claims in INTERVIEWS.md.
+
+Every claim is registered as a pair of predicates, the trips it says are
+treated differently and the comparable trips they should be measured
+against, plus the direction of the effect it predicts. One pass over the
+public cases accumulates, for every claim at once, the treated and control
+distributions of two targets:
+
+- data: expected minus a least-squares linear fit on D, M and R. Does the
+  claim show up in the legacy system's outputs beyond the linear trend
+  (which would otherwise credit every high-spending group with a bonus)?
+- residual: expected minus the calculator's output. Is the effect still
+  missing from the calculator?
+
+Each target gets an effect size (difference of means and Cohen's d), the
+support counts and a Welch t-test, and each claim a verdict against its
+predicted direction. A claim whose treated or control group is smaller
+than --min-support gets "insufficient support" instead of a verdict, since
+the normal approximation to the t-test overstates significance for them.
+
+Usage: python3 hypothesis_bench.py [--calculator calculate_ensemble.js] [--alpha 0.01] [--claim five-day-bonus]
+"""
+import argparse
+import math
+import time
+from collections import namedtuple
+
+from calculators import evaluate_cases, get_calculator
+from path_clusters import fit_linear
+from reimbursement import js_cents
+from scoring import VALID_OUTPUT
+from trip_cases import load_public_cases
+
+Claim = namedtuple('Claim', ['name', 'source', 'description', 'direction', 'treated', 'control'])
+Trip = namedtuple('Trip', ['D', 'M', 'R', 'miles_per_day', 'spending_per_day', 'cents'])
+Effect = namedtuple('Effect', ['treated_mean', 'control_mean', 'difference', 'cohens_d', 't', 'p'])
+
+BONUS = 1
+PENALTY = -1
+
+CLAIMS = [
+    Claim('five-day-bonus', 'Lisa', '5-day trips get a bonus over 4- and 6-day trips', BONUS,
+          lambda t: t.D == 5, lambda t: t.D in (4, 6)),
+    Claim('four-to-six-day-sweet-spot', 'Jennifer', '4-6 day trips are reimbursed better than 2-3 or 7-8', BONUS,
+          lambda t: 4 <= t.D <= 6, lambda t: t.D in (2, 3, 7, 8)),
+    Claim('efficiency-sweet-spot', 'Kevin', '180-220 miles/day beats 120-180 and 220-300', BONUS,
+          lambda t: 180 <= t.miles_per_day <= 220,
+          lambda t: 120 <= t.miles_per_day < 180 or 220 < t.miles_per_day <= 300),
+    Claim('efficiency-drop-off', 'Kevin', 'over 400 miles/day gets less than 220-400', PENALTY,
+          lambda t: t.miles_per_day > 400, lambda t: 220 < t.miles_per_day <= 400),
+    Claim('efficiency-bonus', 'Marcus, Lisa', 'covering lots of ground in a short time pays (D <= 3, 150+ miles/day)',
+          BONUS, lambda t: t.D <= 3 and t.miles_per_day >= 150, lambda t: t.D <= 3 and t.miles_per_day < 150),
+    Claim('short-trip-spending-band', 'Kevin', 'short trips (1-3 days) over $75/day are penalised', PENALTY,
+          lambda t: t.D <= 3 and t.spending_per_day > 75, lambda t: t.D <= 3 and t.spending_per_day <= 75),
+    Claim('short-trip-100-per-day', 'Kevin (variant)', 'under 5 days, over $100/day is penalised', PENALTY,
+          lambda t: t.D < 5 and t.spending_per_day > 100, lambda t: t.D < 5 and t.spending_per_day <= 100),
+    Claim('medium-trip-spending-band', 'Kevin', '4-6 day trips over $120/day are penalised', PENALTY,
+          lambda t: 4 <= t.D <= 6 and t.spending_per_day > 120, lambda t: 4 <= t.D <= 6 and t.spending_per_day <= 120),
+    Claim('long-trip-spending-band', 'Kevin', '7+ day trips over $90/day are penalised', PENALTY,
+          lambda t: t.D >= 7 and t.spending_per_day > 90, lambda t: t.D >= 7 and t.spending_per_day <= 90),
+    Claim('sweet-spot-combo', 'Kevin', '5 days, 180+ miles/day and under $100/day is a guaranteed bonus', BONUS,
+          lambda t: t.D == 5 and t.miles_per_day >= 180 and t.spending_per_day < 100,
+          lambda t: t.D == 5 and not (t.miles_per_day >= 180 and t.spending_per_day < 100)),
+    Claim('vacation-penalty', 'Kevin', '8+ day trips with high spending (over $150/day) are penalised', PENALTY,
+          lambda t: t.D >= 8 and t.spending_per_day > 150, lambda t: t.D >= 8 and t.spending_per_day <= 150),
+    Claim('low-effort-long-trip', 'Marcus (Janet)', '7+ day trips under 50 miles/day get peanuts', PENALTY,
+          lambda t: t.D >= 7 and t.miles_per_day < 50, lambda t: t.D >= 7 and t.miles_per_day >= 50),
+    Claim('eight-day-swing', 'Marcus', '8+ day trips with lots of driving (over 200 miles/day) pay well', BONUS,
+          lambda t: t.D >= 8 and t.miles_per_day > 200, lambda t: t.D >= 8 and t.miles_per_day <= 200),
+    Claim('tiny-receipts-penalty', 'Dave, Jennifer', 'receipts under $30 get less than $30-$100', PENALTY,
+          lambda t: t.R < 30, lambda t: 30 <= t.R < 100),
+    Claim('low-receipts-multi-day', 'Lisa', '$50 in receipts on a multi-day trip is worse than $50-$150', PENALTY,
+          lambda t: t.D > 1 and t.R < 50, lambda t: t.D > 1 and 50 <= t.R < 150),
+    Claim('receipt-sweet-spot', 'Lisa', '$600-$800 in receipts is treated better than $300-$600', BONUS,
+          lambda t: 600 <= t.R < 800, lambda t: 300 <= t.R < 600),
+    Claim('high-spending-cap', 'Marcus', '$2,000 expense weeks get less than $1,200 weeks', PENALTY,
+          lambda t: t.R >= 2000, lambda t: 1000 <= t.R < 1400),
+    Claim('rounding-bug', 'Lisa, Marcus', 'receipts ending in .49 or .99 get a little extra', BONUS,
+          lambda t: t.cents in (0.49, 0.99), lambda t: t.cents not in (0.49, 0.99)),
+]
+
+
+class _Moments:
+    """Running count, sum and sum of squares of one group's target"""
+    __slots__ = ('count', 'total', 'squares')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.squares = 0.0
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.squares += value * value
+
+    def mean(self):
+        return self.total / self.count
+
+    def variance(self):
+        if self.count < 2:
+            return 0.0
+        return max(self.squares - self.total * self.total / self.count, 0.0) / (self.count - 1)
+
+
+def effect(treated, control):
+    """Effect of treated vs control moments, with a Welch t-test, or None without support on both sides"""
+    if treated.count < 2 or control.count < 2:
+        return None
+    difference = treated.mean() - control.mean()
+    pooled = math.sqrt(((treated.count - 1) * treated.variance() + (control.count - 1) * control.variance())
+                       / (treated.count + control.count - 2))
+    standard_error = math.sqrt(treated.variance() / treated.count + control.variance() / control.count)
+    t = difference / standard_error if standard_error else math.copysign(math.inf, difference)
+    p = math.erfc(abs(t) / math.sqrt(2))  # normal approximation to the two-sided Welch p-value
+    return Effect(treated.mean(), control.mean(), difference, difference / pooled if pooled else 0.0, t, p)
+
+
+def evaluate_claims(cases, outputs, claims=CLAIMS):
+    """{claim name: (treated count, control count, data Effect, residual Effect)} from one pass over cases
+
+    Cases whose output is not a number (e.g. 'ERROR') have no residual and are left out of both targets.
+    """
+    intercept, per_day, per_mile, per_receipt = fit_linear(list(zip(cases.durations, cases.miles, cases.receipts)),
+                                                           cases.expected)
+    moments = [[[_Moments(), _Moments()] for _ in range(2)] for _ in claims]  # [claim][group][target]
+    for D, M, R, expected, output in zip(cases.durations, cases.miles, cases.receipts, cases.expected, outputs):
+        if not VALID_OUTPUT.match(output):
+            continue
+        trip = Trip(D, M, R, M / D, R / D, js_cents(R))
+        targets = (expected - (intercept + per_day * D + per_mile * M + per_receipt * R), expected - float(output))
+        for claim, (treated, control) in zip(claims, moments):
+            group = treated if claim.treated(trip) else control if claim.control(trip) else None
+            if group is not None:
+                group[0].add(targets[0])
+                group[1].add(targets[1])
+    return {claim.name: (treated[0].count, control[0].count, effect(treated[0], control[0]),
+                         effect(treated[1], control[1]))
+            for claim, (treated, control) in zip(claims, moments)}
+
+
+def verdict(direction, result, alpha, support=None, min_support=0):
+    """'supported', 'contradicted', 'inconclusive' or 'insufficient support' for a predicted direction.
+
+    support is the size of the smaller of the treated and control groups.
+    """
+    if support is not None and support < min_support:
+        return 'insufficient support'
+    if result is None or result.p >= alpha:
+        return 'inconclusive'
+    return 'supported' if result.difference * direction > 0 else 'contradicted'
+
+
+def format_effect(result):
+    if result is None:
+        return f"{'N/A':>8s} | {'':5s} | {'':7s}"
+    return f"{result.difference:8.2f} | {result.cohens_d:5.2f} | {max(result.p, 1e-99):7.1e}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calculator', default='calculate_ensemble.js', help='calculator whose residuals are tested')
+    parser.add_argument('--alpha', type=float, default=0.01, help='significance level for a verdict')
+    parser.add_argument('--min-support', type=int, default=10, help='smallest treated and control group that gets a verdict')
+    parser.add_argument('--claim', action='append', help='only test these claims (default: all)')
+    args = parser.parse_args()
+
+    claims = [claim for claim in CLAIMS if not args.claim or claim.name in args.claim]
+    cases = load_public_cases()
+    with get_calculator(args.calculator) as calculator:
+        outputs = evaluate_cases(calculator, cases)
+    started = time.perf_counter()
+    results = evaluate_claims(cases, outputs, claims)
+    bench_ms = (time.perf_counter() - started) * 1000
+
+    print("🧾 INTERVIEW HYPOTHESIS BENCH")
+    print("=" * 50)
+    print(f"{len(claims)} claims over {len(cases)} public cases in {bench_ms:.0f} ms; "
+          f"residuals of {args.calculator}; alpha {args.alpha}")
+    failed = sum(not VALID_OUTPUT.match(output) for output in outputs)
+    if failed:
+        print(f"⚠️  skipped {failed} cases where {args.calculator} returned an error")
+    print("Data: expected minus a linear fit on D, M, R. Residual: expected minus the calculator.")
+    print("Δ is treated minus control; a residual effect in the claimed direction means the calculator misses it.\n")
+    print("Claim                      | Treated | Control |  Data Δ$ |     d |       p | Data Verdict         | "
+          "Resid Δ$ |     d |       p | Calculator")
+    print("-" * 140)
+    calculator_labels = {'supported': 'misses it', 'contradicted': 'overshoots', 'inconclusive': 'inconclusive',
+                         'insufficient support': 'insufficient support'}
+    for claim in claims:
+        treated, control, data, residual = results[claim.name]
+        support = min(treated, control)
+        data_verdict = verdict(claim.direction, data, args.alpha, support, args.min_support)
+        residual_verdict = verdict(claim.direction, residual, args.alpha, support, args.min_support)
+        print(f"{claim.name:26s} | {treated:7d} | {control:7d} | {format_effect(data)} | {data_verdict:20s} | "
+              f"{format_effect(residual)} | {calculator_labels[residual_verdict]}")
+
+    print("\nClaims:")
+    for claim in claims:
+        kind = 'bonus' if claim.direction == BONUS else 'penalty'
+        print(f"  {claim.name:26s} {kind:7s} ({claim.source}): {claim.description}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""K-means discovery of calculation paths in trip feature space.
+
+Kevin says there are "at least six different calculation paths" and that he
+found them with k-means. This clusters trips on (D, miles_per_day,
+spending_per_day), standardised, optionally with a calculator's residual as
+an extra dimension so the clusters follow where that calculator goes wrong.
+Every (k, restart) pair is an independent seeded job spread across a process
+pool, so a whole range of k is searched in one call. Each discovered path
+gets its own least-squares fit of the target on D, M and R, and the fitted
+PathModel assigns any number of new cases to a path in one batched call.
+
+Usage: python3 path_clusters.py [--k 2-10] [--paths 6] [--calculator calculate.js] [--save paths.json]
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from calculators import evaluate_cases, get_calculator
+from scoring import VALID_OUTPUT
+from trip_cases import load_private_cases, load_public_cases
+
+FEATURES = ('D', 'miles_per_day', 'spending_per_day')
+
+
+def trip_features(durations, miles, receipts):
+    """Feature columns (D, miles_per_day, spending_per_day) for raw case columns"""
+    return [array('d', durations),
+            array('d', map(lambda m, d: m / d, miles, durations)),
+            array('d', map(lambda r, d: r / d, receipts, durations))]
+
+
+def standardise(columns):
+    """(means, scales) that give every column zero mean and unit variance"""
+    means = [sum(column) / len(column) for column in columns]
+    scales = []
+    for column, mean in zip(columns, means):
+        variance = sum((value - mean) ** 2 for value in column) / len(column)
+        scales.append(math.sqrt(variance) or 1.0)
+    return means, scales
+
+
+def _scaled_columns(columns, means, scales):
+    return [[(value - mean) / scale for value in column] for column, mean, scale in zip(columns, means, scales)]
+
+
+def _assign(columns, centroids):
+    """(labels, squared distances) of the nearest centroid for every point.
+
+    Distances are built a whole column at a time, one list per centroid,
+    rather than point by point.
+    """
+    distances = []
+    for centroid in centroids:
+        total = None
+        for column, centre in zip(columns, centroid):
+            squared = [(value - centre) * (value - centre) for value in column]
+            total = squared if total is None else list(map(float.__add__, total, squared))
+        distances.append(total)
+    labels = []
+    nearest = []
+    for row in zip(*distances):
+        best = min(row)
+        labels.append(row.index(best))
+        nearest.append(best)
+    return labels, nearest
+
+
+def _kmeans_job(job):
+    """One seeded k-means++ run: (k, seed, inertia, centroids)"""
+    columns, k, seed, max_iterations = job
+    rng = random.Random(seed)
+    num_points = len(columns[0])
+
+    def point(index):
+        return tuple(column[index] for column in columns)
+
+    # k-means++ seeding
+    centroids = [point(rng.randrange(num_points))]
+    _, distances = _assign(columns, centroids)
+    while len(centroids) < k:
+        if sum(distances) == 0:
+            centroids.append(point(rng.randrange(num_points)))
+        else:
+            centroids.append(point(rng.choices(range(num_points), weights=distances)[0]))
+        distances = list(map(min, distances, _assign(columns, centroids[-1:])[1]))
+
+    labels = None
+    for _ in range(max_iterations):
+        assignment, _ = _assign(columns, centroids)
+        if assignment == labels:
+            break
+        labels = assignment
+        counts = [0] * k
+        for label in labels:
+            counts[label] += 1
+        sums = [[0.0] * k for _ in columns]
+        for column, totals in zip(columns, sums):
+            for value, label in zip(column, labels):
+                totals[label] += value
+        centroids = [tuple(totals[label] / counts[label] for totals in sums) if counts[label] else centroids[label]
+                     for label in range(k)]
+
+    inertia = sum(_assign(columns, centroids)[1])
+    return k, seed, inertia, centroids
+
+
+def kmeans_search(columns, ks, restarts=10, seed=0, max_iterations=100, workers=None):
+    """Run every (k, restart) pair at once and return {k: (inertia, centroids)} for the best restart"""
+    jobs = [(columns, k, seed * 1000003 + k * 1009 + restart, max_iterations)
+            for k in ks for restart in range(restarts)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        runs = map(_kmeans_job, jobs)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            runs = list(pool.map(_kmeans_job, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+
+    best = {}
+    for k, _, inertia, centroids in runs:
+        if k not in best or inertia < best[k][0]:
+            best[k] = (inertia, centroids)
+    return best
+
+
+def fit_linear(rows, targets, ridge=1e-9):
+    """Least-squares coefficients [intercept, ...] for targets ~ rows, via the normal equations"""
+    width = len(rows[0]) + 1
+    gram = [[0.0] * width for _ in range(width)]
+    moment = [0.0] * width
+    for row, target in zip(rows, targets):
+        x = (1.0,) + tuple(row)
+        for i in range(width):
+            moment[i] += x[i] * target
+            for j in range(width):
+                gram[i][j] += x[i] * x[j]
+    for i in range(width):
+        gram[i][i] += ridge
+
+    # Gaussian elimination with partial pivoting
+    system = [gram[i] + [moment[i]] for i in range(width)]
+    for column in range(width):
+        pivot = max(range(column, width), key=lambda row: abs(system[row][column]))
+        system[column], system[pivot] = system[pivot], system[column]
+        if system[column][column] == 0:
+            continue
+        for row in range(width):
+            if row != column:
+                factor = system[row][column] / system[column][column]
+                for j in range(column, width + 1):
+                    system[row][j] -= factor * system[column][j]
+    return [system[i][width] / system[i][i] if system[i][i] else 0.0 for i in range(width)]
+
+
+def r_squared(rows, targets, coefficients):
+    mean = sum(targets) / len(targets)
+    total = sum((target - mean) ** 2 for target in targets)
+    residual = sum((target - coefficients[0] - sum(c * x for c, x in zip(coefficients[1:], row))) ** 2
+                   for row, target in zip(rows, targets))
+    return 1 - residual / total if total else 1.0
+
+
+class PathModel:
+    """Cluster centroids in trip feature space, with a linear fit per path.
+
+    Centroids found with a residual dimension keep only their trip-feature
+    coordinates, so new cases (which have no residual) can still be assigned;
+    the fits themselves come from the full clustering's labels.
+    """
+
+    def __init__(self, centroids, means, scales, fits=None):
+        self.centroids = [tuple(centroid[:len(FEATURES)]) for centroid in centroids]
+        self.means = list(means[:len(FEATURES)])
+        self.scales = list(scales[:len(FEATURES)])
+        self.fits = fits or []
+
+    def assign(self, durations, miles, receipts):
+        """Path index for every case, in one batched pass"""
+        columns = _scaled_columns(trip_features(durations, miles, receipts), self.means, self.scales)
+        return array('i', _assign(columns, self.centroids)[0])
+
+    def centroid_features(self, index):
+        """A path's centroid in original units"""
+        return tuple(value * scale + mean for value, mean, scale in zip(self.centroids[index], self.means, self.scales))
+
+    def to_dict(self):
+        return {'features': list(FEATURES), 'means': self.means, 'scales': self.scales,
+                'centroids': [list(centroid) for centroid in self.centroids], 'fits': self.fits}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['centroids'], data['means'], data['scales'], data.get('fits'))
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write('\n')
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+
+def fit_paths(cases, centroids, means, scales, targets, labels=None):
+    """PathModel for the given centroids, with a linear fit of targets per path.
+
+    labels are the clustering's own path of each case; without them the cases
+    are assigned with the model's trip-feature centroids.
+    """
+    model = PathModel(centroids, means, scales)
+    if labels is None:
+        labels = model.assign(cases.durations, cases.miles, cases.receipts)
+    for index in range(len(model.centroids)):
+        rows = [(d, m, r) for d, m, r, label in zip(cases.durations, cases.miles, cases.receipts, labels)
+                if label == index]
+        path_targets = [target for target, label in zip(targets, labels) if label == index]
+        if len(rows) > 4:
+            coefficients = fit_linear(rows, path_targets)
+            fit_r2 = r_squared(rows, path_targets, coefficients)
+        else:
+            coefficients, fit_r2 = None, None
+        model.fits.append({'count': len(rows), 'coefficients': coefficients, 'r2': fit_r2,
+                           'mean_target': sum(path_targets) / len(path_targets) if path_targets else None})
+    return model, labels
+
+
+def parse_k_range(text):
+    if '-' in text:
+        low, high = text.split('-')
+        return list(range(int(low), int(high) + 1))
+    return [int(value) for value in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--k', default='2-10', help='values of k to search, e.g. 2-10 or 4,6,8')
+    parser.add_argument('--paths', type=int, default=6, help='k to report paths for (Kevin: at least six)')
+    parser.add_argument('--restarts', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--calculator', help='cluster and fit the residuals (expected - output) of this calculator')
+    parser.add_argument('--save', help='write the fitted PathModel as JSON')
+    args = parser.parse_args()
+
+    cases = load_public_cases()
+    targets = list(cases.expected)
+    target_name = 'expected'
+    failed = 0
+    if args.calculator:
+        with get_calculator(args.calculator) as calculator:
+            outputs = evaluate_cases(calculator, cases)
+        # Cases the calculator failed on have no residual; leave them out of the clustering
+        valid = [row for row, output in enumerate(outputs) if VALID_OUTPUT.match(output)]
+        failed = len(cases) - len(valid)
+        cases = cases.take(valid)
+        targets = [expected - float(outputs[row]) for expected, row in zip(cases.expected, valid)]
+        target_name = f"residual of {args.calculator}"
+    columns = trip_features(cases.durations, cases.miles, cases.receipts)
+    if args.calculator:
+        columns.append(array('d', targets))
+
+    means, scales = standardise(columns)
+    scaled = _scaled_columns(columns, means, scales)
+    ks = sorted(set(parse_k_range(args.k)) | {args.paths})
+
+    started = time.perf_counter()
+    searched = kmeans_search(scaled, ks, args.restarts, args.seed, workers=args.workers)
+    search_seconds = time.perf_counter() - started
+
+    print("🧭 CALCULATION PATH DISCOVERY")
+    print("=" * 50)
+    print(f"{len(cases)} public cases, target: {target_name}, features: {', '.join(FEATURES)}"
+          f"{' + residual' if args.calculator else ''}")
+    if failed:
+        print(f"⚠️  skipped {failed} cases where {args.calculator} returned an error")
+    print(f"{len(ks)} values of k x {args.restarts} restarts in {search_seconds:.2f}s\n")
+
+    print(" k |    Inertia | Explained")
+    print("-" * 28)
+    total_inertia = len(cases) * len(columns)  # standardised columns each have variance 1
+    for k in ks:
+        inertia = searched[k][0]
+        print(f"{k:2d} | {inertia:10.2f} | {1 - inertia / total_inertia:8.1%}")
+
+    # Fit on the labels k-means found (residual included); the model's trip-feature
+    # projection is only for assigning cases that have no residual
+    labels = array('i', _assign(scaled, searched[args.paths][1])[0])
+    model, labels = fit_paths(cases, searched[args.paths][1], means, scales, targets, labels)
+    print(f"\n=== {args.paths} PATHS ===")
+    print("Path | Count |    D | Miles/Day | Spend/Day | Mean Target | Intercept | Per Day | Per Mile | Per $ Receipt |   R²")
+    print("-" * 113)
+    for index, fit in enumerate(model.fits):
+        duration, miles_per_day, spending_per_day = model.centroid_features(index)
+        mean_target = 'N/A' if fit['mean_target'] is None else f"{fit['mean_target']:.2f}"
+        if fit['coefficients'] is None:
+            fitted = f"{'too few cases':>52s}"
+        else:
+            intercept, per_day, per_mile, per_receipt = fit['coefficients']
+            fitted = f"{intercept:9.2f} | {per_day:7.2f} | {per_mile:8.3f} | {per_receipt:13.3f} | {fit['r2']:4.2f}"
+        print(f"{index:4d} | {fit['count']:5d} | {duration:4.1f} | {miles_per_day:9.1f} | {spending_per_day:9.1f} | "
+              f"{mean_target:>11s} | {fitted}")
+
+    if args.calculator:
+        projected = model.assign(cases.durations, cases.miles, cases.receipts)
+        agree = sum(1 for label, other in zip(labels, projected) if label == other)
+        print(f"\nTrip features alone put {agree}/{len(cases)} public cases on their clustered path")
+
+    private = load_private_cases()
+    started = time.perf_counter()
+    private_labels = model.assign(private.durations, private.miles, private.receipts)
+    assign_ms = (time.perf_counter() - started) * 1000
+    counts = [0] * len(model.centroids)
+    for label in private_labels:
+        counts[label] += 1
+    print(f"\nAssigned {len(private)} private cases in {assign_ms:.1f} ms: "
+          + ', '.join(f"path {index}: {count}" for index, count in enumerate(counts)))
+
+    if args.save:
+        model.save(args.save)
+        print(f"Saved path model to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Permutation importance and pairwise interactions of calculator inputs.
+
+Each feature is broken by shuffling it across the public cases and writing
+the shuffled value back into the inputs the calculator sees: D, M and R
+directly, miles_per_day and spending_per_day by rebuilding M or R from the
+case's own D, and receipt_cents by swapping only the cents of R. The
+importance of a feature is how much the eval.sh score gets worse; the
+interaction of a pair is how much worse breaking both is than the sum of
+breaking each. Pairs that would write the same input are skipped.
+
+One repeat draws one permutation per feature, reuses it for every single
+and pair (which keeps interaction estimates low-variance), and evaluates
+all of them in a single batched calculator call. Repeats are spread over a
+process pool with one calculator per worker.
+
+Usage: python3 permutation_importance.py [--calculator calculate_ensemble.js] [--repeats 10] [--workers N]
+"""
+import argparse
+import itertools
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from calculators import evaluate_cases, get_calculator
+from scoring import score_outputs
+from trip_cases import load_public_cases
+
+# Feature -> input it rewrites; features are applied in this order, so ratios use the case's final D
+FEATURES = {
+    'D': 'days',
+    'M': 'miles',
+    'R': 'receipts',
+    'miles_per_day': 'miles',
+    'spending_per_day': 'receipts',
+    'receipt_cents': 'receipts',
+}
+
+
+def feature_values(cases):
+    """{feature: column} of the values that get shuffled"""
+    return {
+        'D': list(cases.durations),
+        'M': list(cases.miles),
+        'R': list(cases.receipts),
+        'miles_per_day': list(cases.miles_per_day),
+        'spending_per_day': list(cases.spending_per_day),
+        'receipt_cents': [cents % 100 for cents in cases.receipts_cents],
+    }
+
+
+def feature_pairs():
+    return [(a, b) for a, b in itertools.combinations(FEATURES, 2) if FEATURES[a] != FEATURES[b]]
+
+
+def permuted_inputs(cases, values, permutations, features):
+    """(durations, miles, receipts) with the given features replaced by their permuted values"""
+    durations = list(cases.durations)
+    miles = list(cases.miles)
+    receipts = list(cases.receipts)
+    for feature in FEATURES:
+        if feature not in features:
+            continue
+        shuffled = [values[feature][row] for row in permutations[feature]]
+        if feature == 'D':
+            durations = shuffled
+        elif feature == 'M':
+            miles = shuffled
+        elif feature == 'R':
+            receipts = shuffled
+        elif feature == 'miles_per_day':
+            miles = [round(rate * days) for rate, days in zip(shuffled, durations)]
+        elif feature == 'spending_per_day':
+            receipts = [round(rate * days, 2) for rate, days in zip(shuffled, durations)]
+        else:
+            receipts = [(round(amount * 100) // 100 * 100 + cents) / 100
+                        for amount, cents in zip(receipts, shuffled)]
+    return durations, miles, receipts
+
+
+# Set in each worker by _start_worker; the parent's own calculator when running serially
+_CALCULATOR = None
+_CASES = None
+
+
+def _start_worker(calculator_spec):
+    global _CALCULATOR, _CASES
+    _CALCULATOR = get_calculator(calculator_spec)
+    _CASES = load_public_cases()
+
+
+def _repeat_job(job):
+    """Scores of every single feature and pair for one seeded repeat: {features: score}"""
+    seed, subsets = job
+    cases = _CASES
+    rng = random.Random(seed)
+    values = feature_values(cases)
+    permutations = {}
+    for feature in FEATURES:
+        order = list(range(len(cases)))
+        rng.shuffle(order)
+        permutations[feature] = order
+
+    columns = ([], [], [])
+    for subset in subsets:
+        for column, part in zip(columns, permuted_inputs(cases, values, permutations, subset)):
+            column.extend(part)
+    outputs = _CALCULATOR.evaluate(*columns)
+
+    scores = {}
+    for index, subset in enumerate(subsets):
+        chunk = outputs[index * len(cases):(index + 1) * len(cases)]
+        scores[subset] = score_outputs(chunk, cases.expected)['score']
+    return scores
+
+
+def permutation_importance(calculator_spec, repeats=10, seed=0, workers=None, pairs=True):
+    """(baseline score, {subset: [score increase per repeat]}) for every feature and, optionally, pair"""
+    subsets = [(feature,) for feature in FEATURES] + (feature_pairs() if pairs else [])
+    jobs = [(seed * 1000003 + repeat, subsets) for repeat in range(repeats)]
+
+    _start_worker(calculator_spec)
+    try:
+        baseline = score_outputs(evaluate_cases(_CALCULATOR, _CASES), _CASES.expected)['score']
+        workers = min(workers or os.cpu_count() or 1, repeats)
+        if workers == 1:
+            runs = list(map(_repeat_job, jobs))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_start_worker,
+                                     initargs=(calculator_spec,)) as pool:
+                runs = list(pool.map(_repeat_job, jobs))
+    finally:
+        _CALCULATOR.close()
+
+    increases = {subset: [run[subset] - baseline for run in runs] for subset in subsets}
+    return baseline, increases
+
+
+def mean_and_error(values):
+    """Mean and its standard error"""
+    mean = sum(values) / len(values)
+    if len(values) < 2:
+        return mean, 0.0
+    variance = sum((value - mean) ** 2 for value in values) / (len(values) - 1)
+    return mean, math.sqrt(variance / len(values))
+
+
+def interactions(increases):
+    """{(a, b): [pair increase - a increase - b increase per repeat]} for every pair evaluated"""
+    return {subset: [pair - single_a - single_b for pair, single_a, single_b
+                     in zip(values, increases[subset[:1]], increases[subset[1:]])]
+            for subset, values in increases.items() if len(subset) == 2}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calculator', default='calculate_ensemble.js', help='calculator to score (run.sh engine by default)')
+    parser.add_argument('--repeats', type=int, default=10, help='permutations per feature')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no-pairs', action='store_true', help='only permute single features')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    baseline, increases = permutation_importance(args.calculator, args.repeats, args.seed, args.workers,
+                                                 not args.no_pairs)
+    seconds = time.perf_counter() - started
+    evaluations = len(increases) * args.repeats * len(load_public_cases())
+
+    print("🔀 PERMUTATION IMPORTANCE")
+    print("=" * 50)
+    print(f"{args.calculator}: baseline score {baseline:.2f}; {len(increases)} feature sets x {args.repeats} "
+          f"repeats = {evaluations} evaluations in {seconds:.2f}s\n")
+
+    print("Feature            | Score Increase |   ± SE")
+    print("-" * 44)
+    singles = sorted((subset for subset in increases if len(subset) == 1),
+                     key=lambda subset: -mean_and_error(increases[subset])[0])
+    for subset in singles:
+        mean, error = mean_and_error(increases[subset])
+        print(f"{subset[0]:18s} | {mean:14.2f} | {error:6.2f}")
+
+    pair_interactions = interactions(increases)
+    if pair_interactions:
+        print("\nPair                              | Score Increase | Interaction |   ± SE")
+        print("-" * 76)
+        for subset in sorted(pair_interactions, key=lambda subset: -abs(mean_and_error(pair_interactions[subset])[0])):
+            increase, _ = mean_and_error(increases[subset])
+            interaction, error = mean_and_error(pair_interactions[subset])
+            print(f"{' x '.join(subset):33s} | {increase:14.2f} | {interaction:11.2f} | {error:6.2f}")
+        print("\nInteraction = pair increase - sum of single increases; positive means the features"
+              " matter more together, negative that they overlap.")
+
+
+if __name__ == "__main__":
+    main()
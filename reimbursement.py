@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""Python ports of calculate.js and calculate_formula.js.
+
+Both ports reproduce the JS engines bit for bit: the same IEEE double
+operations in the same order, JS Number.prototype.toFixed rounding, the JS
+remainder operator for the cents check, division by zero, NaN-propagating
+Math.max/Math.min, and parseInt/parseFloat argument parsing for the command
+line. fuzz_calculators.py checks them against the
+JS originals.
+
+Usage: python3 reimbursement.py <trip_duration_days> <miles_traveled> <total_receipts_amount>
+"""
+import math
+import re
+import sys
+from decimal import ROUND_HALF_UP, Decimal
+
+# ==========================================
+# JS SEMANTICS
+# ==========================================
+JS_INT_PREFIX = re.compile(r'^\s*([+-]?\d+)')
+JS_FLOAT_PREFIX = re.compile(r'^\s*([+-]?(?:Infinity|\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?))')
+
+CENT = Decimal('0.01')
+MAX_SAFE_INTEGER = 2 ** 53 - 1
+
+
+def js_parse_int(text):
+    """parseInt(text, 10) for decimal strings"""
+    match = JS_INT_PREFIX.match(str(text))
+    if not match:
+        return math.nan
+    value = int(match.group(1))
+    if value == 0 and match.group(1).startswith('-'):
+        return -0.0
+    # JS numbers are doubles: beyond 2**53 keep the rounded value node sees
+    return value if abs(value) <= MAX_SAFE_INTEGER else float(value)
+
+
+def js_parse_float(text):
+    """parseFloat(text)"""
+    match = JS_FLOAT_PREFIX.match(str(text))
+    if not match:
+        return math.nan
+    return float(match.group(1).replace('Infinity', 'inf'))
+
+
+def js_to_fixed_2(value):
+    """Number.prototype.toFixed(2): round the exact binary value, ties away from zero"""
+    if value != value:
+        return 'NaN'
+    if value == 0:
+        return '0.00'  # covers -0, which JS prints without a sign
+    if value < 0:
+        return '-' + js_to_fixed_2(-value)
+    if value >= 1e21:
+        # toFixed falls back to ToString here: 'Infinity', '1e+21', ...
+        return 'Infinity' if value == math.inf else repr(float(value))
+    # '%.2f' rounds ties to even; exact ties always show a 5 in the third place
+    if ('%.3f' % value)[-1] != '5':
+        return '%.2f' % value
+    return str(Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def js_cents(receipts):
+    """parseFloat((R % 1).toFixed(2)) as used by the rounding-bug checks"""
+    if not math.isfinite(receipts):
+        return math.nan  # Infinity % 1 and NaN % 1 are NaN
+    return float(js_to_fixed_2(math.fmod(receipts, 1.0)))
+
+
+def js_div(dividend, divisor):
+    """dividend / divisor where the divisor may be zero: Infinity, -Infinity or NaN as in JS"""
+    if divisor:
+        return dividend / divisor
+    if dividend != dividend or dividend == 0:
+        return math.nan
+    return math.copysign(math.inf, dividend) * math.copysign(1.0, divisor)
+
+
+def js_max(a, b):
+    """Math.max(a, b): NaN if either is NaN"""
+    if a != a or b != b:
+        return math.nan
+    return a if a > b else b
+
+
+def js_min(a, b):
+    """Math.min(a, b): NaN if either is NaN"""
+    if a != a or b != b:
+        return math.nan
+    return a if a < b else b
+
+
+# ==========================================
+# calculate.js
+# ==========================================
+def calculate_tiered(D, M, R):
+    """Port of calculateReimbursement from calculate.js"""
+    # BLOCK 1: PER DIEM CALCULATION
+    if D == 1:
+        per_diem_base = 120
+    elif D == 2:
+        per_diem_base = D * 100
+    elif D == 3:
+        per_diem_base = D * 95
+    elif D == 4:
+        per_diem_base = D * 90
+    elif D == 5:
+        per_diem_base = D * 95
+    elif D == 6:
+        per_diem_base = D * 85
+    elif D >= 7 and D <= 9:
+        per_diem_base = D * 78
+    elif D >= 10 and D <= 12:
+        per_diem_base = D * 72
+    else:
+        per_diem_base = D * 65
+
+    per_diem_bonus = 0
+    if D == 5:
+        per_diem_bonus = 75
+    if D == 1:
+        per_diem_bonus = 50
+
+    per_diem_total = per_diem_base + per_diem_bonus
+
+    # BLOCK 2: MILEAGE CALCULATION
+    mileage_base = 0
+    if M > 0:
+        if M <= 50:
+            mileage_base = M * 0.75
+        elif M <= 100:
+            mileage_base = (50 * 0.75) + (M - 50) * 0.58
+        elif M <= 200:
+            mileage_base = (50 * 0.75) + (50 * 0.58) + (M - 100) * 0.48
+        elif M <= 300:
+            mileage_base = (50 * 0.75) + (50 * 0.58) + (100 * 0.48) + (M - 200) * 0.42
+        elif M <= 500:
+            mileage_base = (50 * 0.75) + (50 * 0.58) + (100 * 0.48) + (100 * 0.42) + (M - 300) * 0.38
+        elif M <= 700:
+            mileage_base = (50 * 0.75) + (50 * 0.58) + (100 * 0.48) + (100 * 0.42) + (200 * 0.38) + (M - 500) * 0.34
+        elif M <= 1000:
+            mileage_base = ((50 * 0.75) + (50 * 0.58) + (100 * 0.48) + (100 * 0.42) + (200 * 0.38)
+                            + (200 * 0.34) + (M - 700) * 0.30)
+        else:
+            mileage_base = ((50 * 0.75) + (50 * 0.58) + (100 * 0.48) + (100 * 0.42) + (200 * 0.38)
+                            + (200 * 0.34) + (300 * 0.30) + (M - 1000) * 0.25)
+
+    mileage_total = mileage_base
+
+    # BLOCK 3: RECEIPT REIMBURSEMENT
+    receipt_base = 0
+    daily_receipts = R / D if D else js_div(R, D)
+
+    if R > 0:
+        if R < 30:
+            receipt_base = R * -1.5
+        else:
+            if R <= 150:
+                receipt_base = R * 0.75
+            elif R <= 500:
+                receipt_base = (150 * 0.75) + (R - 150) * 0.55
+            elif R <= 1000:
+                receipt_base = (150 * 0.75) + (350 * 0.55) + (R - 500) * 0.50
+            elif R <= 1500:
+                receipt_base = (150 * 0.75) + (350 * 0.55) + (500 * 0.50) + (R - 1000) * 0.55
+            else:
+                receipt_base = (150 * 0.75) + (350 * 0.55) + (500 * 0.50) + (500 * 0.55) + (R - 1500) * 0.40
+
+        if R > 0 and daily_receipts < 12 and D > 1:
+            receipt_base -= 25
+
+    receipt_total = receipt_base
+
+    # BLOCK 4: BASE REIMBURSEMENT
+    reimbursement = per_diem_total + mileage_total + receipt_total
+
+    # BLOCK 5: EFFICIENCY ADJUSTMENTS
+    miles_per_day = M / D if D else js_div(M, D)
+    spending_per_day = R / D if D else js_div(R, D)
+
+    if D == 1:
+        if spending_per_day > 1500:
+            reimbursement *= 0.45
+        elif spending_per_day > 800:
+            reimbursement *= 0.65
+        elif spending_per_day > 400:
+            reimbursement *= 0.85
+        elif miles_per_day >= 300 and miles_per_day <= 600:
+            reimbursement *= 1.35
+        elif miles_per_day >= 180 and miles_per_day < 300:
+            reimbursement *= 1.25
+        elif miles_per_day >= 100 and miles_per_day < 180:
+            reimbursement *= 1.15
+        elif miles_per_day > 600:
+            reimbursement *= 0.65
+    else:
+        if miles_per_day >= 180 and miles_per_day <= 220:
+            reimbursement *= 1.20
+        elif miles_per_day >= 100 and miles_per_day < 180:
+            reimbursement *= 1.10
+        elif D <= 3 and miles_per_day > 400:
+            reimbursement *= 1.30
+        elif miles_per_day > 350 and D > 3:
+            reimbursement *= 0.40
+
+    # BLOCK 6: SPENDING PENALTIES
+    if D >= 7 and miles_per_day < 100 and spending_per_day > 180:
+        if spending_per_day > 200:
+            reimbursement *= 0.30
+        else:
+            reimbursement *= 0.50
+    elif D == 5 and spending_per_day > 350 and spending_per_day < 440 and miles_per_day < 150:
+        reimbursement *= 0.35
+    elif spending_per_day > 440:
+        reimbursement *= 0.70
+    elif D <= 3 and spending_per_day > 400:
+        reimbursement *= 0.75
+    elif D >= 8 and spending_per_day > 250:
+        reimbursement *= 0.85
+    elif D >= 4 and D <= 6 and spending_per_day > 300 and miles_per_day > 150:
+        reimbursement *= 1.20
+
+    # BLOCK 7: INTERACTION BONUSES
+    if D == 5 and miles_per_day >= 180 and spending_per_day <= 100:
+        reimbursement += 150
+    if D >= 8 and miles_per_day > 200:
+        reimbursement *= 1.15
+
+    # BLOCK 8: EDGE CASE PENALTIES
+    if D >= 7 and miles_per_day < 50:
+        reimbursement *= 0.65
+
+    # BLOCK 9: QUIRKS AND BUGS
+    cents = js_cents(R)
+    if cents == 0.49 or cents == 0.99:
+        reimbursement += 20
+
+    # BLOCK 10: FINAL VALIDATION
+    if reimbursement < 0:
+        reimbursement = 0
+
+    return js_to_fixed_2(reimbursement)
+
+
+# ==========================================
+# calculate_formula.js
+# ==========================================
+FORMULA_CONSTANTS = {
+    'RECEIPT_CAP_UPPER': 1153.77,
+    'RECEIPT_CAP_LOWER': 359.88,
+    'MILEAGE_RATE': 0.426,
+    'PER_DIEM_BASE': 73.58,
+    'SECOND_WEEK_PENALTY_PER_DAY': 45.0,
+    'ROUNDOFF_PENALTY_RATE': 1.11,
+    'GLOBAL_OFFSET': 208.0,
+    'ROUNDOFF_OFFSET': -323.55,
+}
+
+# Receipt-cap overrides for long trips: (min days, miles below, upper cap), first match wins
+RECEIPT_CAP_BANDS = (
+    (10, 300, 1600),
+    (10, 600, 1400),
+    (8, 500, 1400),
+)
+
+
+def calculate_formula(D, M, R, constants=FORMULA_CONSTANTS, cap_bands=RECEIPT_CAP_BANDS):
+    """Port of calculateReimbursement from calculate_formula.js"""
+    # 1. Per Diem Calculation
+    per_diem = constants['PER_DIEM_BASE'] * D
+
+    # 2. Second week penalty (after day 7)
+    per_diem_penalty = constants['SECOND_WEEK_PENALTY_PER_DAY'] * js_max(0, D - 7)
+    per_diem_penalized = per_diem - per_diem_penalty
+
+    # 3. Mileage allowance (linear rate)
+    mileage_allowance = constants['MILEAGE_RATE'] * M
+
+    # 4. Receipt reimbursement (capped, with adjustment for long trips)
+    receipt_cap_upper = constants['RECEIPT_CAP_UPPER']
+    receipt_cap_lower = constants['RECEIPT_CAP_LOWER']
+    for min_days, miles_below, cap in cap_bands:
+        if D >= min_days and M < miles_below:
+            receipt_cap_upper = cap
+            break
+
+    capped_receipts = js_max(receipt_cap_lower, js_min(R, receipt_cap_upper))
+
+    # 5. Rounding penalty logic
+    roundoff_penalty = 0
+    cents = js_cents(R)
+    if cents == 0.49 or cents == 0.99:
+        roundoff_penalty = constants['ROUNDOFF_PENALTY_RATE'] * capped_receipts + constants['ROUNDOFF_OFFSET']
+
+    # 6. Base calculation
+    reimbursement = (per_diem_penalized + mileage_allowance + capped_receipts - roundoff_penalty
+                     - constants['GLOBAL_OFFSET'])
+
+    # CONTEXT-AWARE ADJUSTMENTS
+    miles_per_day = M / D if D else js_div(M, D)
+    spending_per_day = R / D if D else js_div(R, D)
+
+    if miles_per_day >= 180 and miles_per_day <= 220:
+        reimbursement += 40
+
+    if D >= 8 and miles_per_day < 50 and spending_per_day > 200:
+        reimbursement *= 0.65
+
+    if D >= 4 and D <= 6 and miles_per_day > 200 and spending_per_day > 300 and spending_per_day < 440:
+        reimbursement *= 1.15
+
+    if D == 5 and miles_per_day > 100 and spending_per_day < 350:
+        if miles_per_day > 200:
+            reimbursement += 25
+        else:
+            reimbursement += 50
+
+    # FINAL VALIDATION
+    if reimbursement < 0:
+        reimbursement = 0
+
+    return js_to_fixed_2(reimbursement)
+
+
+# Ports keyed by the JS engine they reproduce
+PORTS = {
+    'calculate.js': calculate_tiered,
+    'calculate_formula.js': calculate_formula,
+}
+
+
+def cli_int(value):
+    """parseInt(String(value), 10) without the round trip for ordinary numbers"""
+    if isinstance(value, int):
+        return value
+    text = repr(value)
+    if 'e' in text or 'n' in text:
+        return js_parse_int(text)
+    return int(value)
+
+
+def cli_args(days, miles, receipts):
+    """Numbers as the JS CLI sees them after formatting them on a command line"""
+    return cli_int(days), cli_int(miles), float(receipts)
+
+
+def parse_args(days, miles, receipts):
+    """Parse command-line strings exactly like the JS engines' CLI"""
+    return js_parse_int(days), js_parse_int(miles), js_parse_float(receipts)
+
+
+if __name__ == "__main__":
+    print(calculate_formula(*parse_args(*sys.argv[1:4])))
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Long-running local HTTP service for calculateReimbursement.
+
+Keeps one calculator loaded (by default the calculate_ensemble.js engine that
+run.sh uses, driven through a single node process), groups concurrent
+requests into micro-batches, answers repeated inputs from an LRU cache, and
+reports latency and cache metrics.
+
+Endpoints:
+  POST /calculate       {"trip_duration_days": 5, "miles_traveled": 250, "total_receipts_amount": 150.75}
+  GET  /calculate?trip_duration_days=5&miles_traveled=250&total_receipts_amount=150.75
+  POST /calculate/bulk  {"cases": [{...}, ...]}
+  GET  /metrics
+  GET  /health
+
+Usage: python3 reimbursement_server.py [--port 8090] [--engine calculate_ensemble.js]
+"""
+import argparse
+import json
+import math
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from calculators import get_calculator
+from reimbursement import cli_args
+
+INPUT_FIELDS = ('trip_duration_days', 'miles_traveled', 'total_receipts_amount')
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with hit/miss counters"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+class MicroBatcher:
+    """Collects cases from many request threads and evaluates them in one calculator call.
+
+    A single worker thread owns the calculator. It waits for the first case,
+    keeps collecting for up to max_wait seconds or max_batch cases, then
+    evaluates the batch and resolves each caller's future.
+    """
+
+    def __init__(self, calculator, max_batch=512, max_wait=0.002):
+        self.calculator = calculator
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.batched_cases = 0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, case):
+        future = Future()
+        self._queue.put((case, future))
+        return future
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            cases = [case for case, _ in pending]
+            try:
+                durations, miles, receipts = zip(*cases)
+                results = self.calculator.evaluate(durations, miles, receipts)
+            except Exception as exc:
+                for _, future in pending:
+                    future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.batched_cases += len(pending)
+            for (_, future), result in zip(pending, results):
+                future.set_result(result)
+
+
+class LatencyRecorder:
+    """Rolling window of request latencies per endpoint"""
+
+    def __init__(self, window=10000):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds):
+        with self._lock:
+            self._samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            snapshot = {endpoint: sorted(samples) for endpoint, samples in self._samples.items()}
+            counts = dict(self._counts)
+        return {endpoint: {
+            'requests': counts[endpoint],
+            'p50_ms': percentile(samples, 0.50) * 1000,
+            'p99_ms': percentile(samples, 0.99) * 1000,
+            'max_ms': samples[-1] * 1000,
+        } for endpoint, samples in snapshot.items()}
+
+
+def percentile(sorted_samples, q):
+    index = min(len(sorted_samples) - 1, max(0, int(round(q * (len(sorted_samples) - 1)))))
+    return sorted_samples[index]
+
+
+class ReimbursementService:
+    """Cache in front of a micro-batched calculator"""
+
+    def __init__(self, calculator, cache_size=100000, max_batch=512, max_wait=0.002):
+        self.calculator = calculator
+        self.cache = LRUCache(cache_size)
+        self.batcher = MicroBatcher(calculator, max_batch, max_wait)
+        self.latency = LatencyRecorder()
+
+    def calculate_many(self, raw_cases):
+        """Reimbursements for a list of {trip_duration_days, miles_traveled, total_receipts_amount}"""
+        keys = [parse_case(raw) for raw in raw_cases]
+        results = [None] * len(keys)
+        waiting = {}
+        for index, key in enumerate(keys):
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[index] = cached
+            elif key in waiting:
+                waiting[key][1].append(index)
+            else:
+                waiting[key] = (self.batcher.submit(key), [index])
+
+        for key, (future, indices) in waiting.items():
+            result = future.result()
+            self.cache.put(key, result)
+            for index in indices:
+                results[index] = result
+        return results
+
+    def metrics(self):
+        batches = self.batcher.batches
+        return {
+            'engine': getattr(self.calculator, 'name', str(self.calculator)),
+            'latency': self.latency.stats(),
+            'cache': self.cache.stats(),
+            'batching': {
+                'batches': batches,
+                'cases': self.batcher.batched_cases,
+                'avg_batch_size': self.batcher.batched_cases / batches if batches else 0.0,
+            },
+        }
+
+
+def parse_number(field, value):
+    """A finite int or float for one input; numeric strings are converted, anything else rejected"""
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            raise ValueError(f"{field} must be a number, got {value!r}")
+    # bool is an int subclass, and True == 1 would share a cache key with D=1
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or \
+            (isinstance(value, float) and not math.isfinite(value)):
+        raise ValueError(f"{field} must be a finite number, got {value!r}")
+    return value
+
+
+def parse_case(raw):
+    """Validate one input case and key it by the values the calculator will actually see"""
+    if not isinstance(raw, dict):
+        raise ValueError(f"each case must be an object with {', '.join(INPUT_FIELDS)}")
+    try:
+        values = [parse_number(field, raw[field]) for field in INPUT_FIELDS]
+    except KeyError:
+        raise ValueError(f"each case needs {', '.join(INPUT_FIELDS)}")
+    try:
+        return cli_args(*values)
+    except (OverflowError, ValueError):
+        raise ValueError(f"input out of range in {raw!r}")
+
+
+class ReimbursementHTTPServer(ThreadingHTTPServer):
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return json.loads(self.rfile.read(length) or b'{}')
+
+        def _timed(self, endpoint, handler):
+            started = time.perf_counter()
+            try:
+                status, payload = handler()
+            except ValueError as exc:
+                status, payload = 400, {'error': str(exc)}
+            except Exception as exc:
+                status, payload = 500, {'error': str(exc)}
+            self._send(status, payload)
+            service.latency.record(endpoint, time.perf_counter() - started)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/calculate':
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                self._timed('/calculate', lambda: (200, {'reimbursement': service.calculate_many([query])[0]}))
+            elif url.path == '/metrics':
+                self._send(200, service.metrics())
+            elif url.path == '/health':
+                self._send(200, {'status': 'ok'})
+            else:
+                self._send(404, {'error': f"unknown endpoint {url.path}"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path == '/calculate':
+                self._timed('/calculate', lambda: (200, {'reimbursement': service.calculate_many([self._read_json()])[0]}))
+            elif url.path == '/calculate/bulk':
+                def bulk():
+                    body = self._read_json()
+                    cases = body.get('cases') if isinstance(body, dict) else None
+                    if not isinstance(cases, list):
+                        raise ValueError('expected {"cases": [...]}')
+                    return 200, {'results': service.calculate_many(cases)}
+                self._timed('/calculate/bulk', bulk)
+            else:
+                # Drain the body so the next request on this keep-alive connection starts cleanly
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                self._send(404, {'error': f"unknown endpoint {url.path}"})
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--engine', default='calculate_ensemble.js', help='calculator spec (see calculators.py)')
+    parser.add_argument('--cache-size', type=int, default=100000)
+    parser.add_argument('--max-batch', type=int, default=512)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    calculator = get_calculator(args.engine)
+    service = ReimbursementService(calculator, args.cache_size, args.max_batch, args.max_wait_ms / 1000)
+    server = ReimbursementHTTPServer((args.host, args.port), make_handler(service))
+    print(f"🧾 Reimbursement service ({args.engine}) listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        calculator.close()
+
+
+if __name__ == "__main__":
+    main()
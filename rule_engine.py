@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""Table-driven reimbursement rules compiled into a batch evaluator.
+
+A rule set (see calculate_rules.json) is plain data:
+
+- components: summed parts of the base amount. Each has an input, an
+  optional first-match table of {"when", "flat" | "rate"} rows, optional
+  marginal tiers [[upper bound, rate], ...] and optional adjustment rows.
+- adjustments: groups of {"when", "multiply" | "add"} rows applied to the
+  running total, either first-match ("first") or every match ("all").
+- floor: lower bound of the result.
+
+Conditions are [feature, operator, value] with features D, M, R,
+miles_per_day, spending_per_day and cents. The compiler turns a rule set
+into Python source for one function that evaluates a whole batch, with the
+same floating-point operations, in the same order, as the hand-written JS.
+
+Usage: python3 rule_engine.py [rules.json] [--show-source]
+"""
+import argparse
+import copy
+import json
+import math
+
+from reimbursement import cli_int, js_cents, js_div, js_to_fixed_2, parse_args
+
+FEATURES = {'D', 'M', 'R', 'miles_per_day', 'spending_per_day', 'cents'}
+DERIVED_FEATURES = {
+    'miles_per_day': 'miles_per_day = M / D if D else js_div(M, D)',
+    'spending_per_day': 'spending_per_day = R / D if D else js_div(R, D)',
+}
+OPERATORS = {'<', '<=', '>', '>=', '==', '!=', 'in'}
+# Negations that also hold for NaN; '<' and '>=' are both false for NaN
+NEGATIONS = {'==': '!=', '!=': '=='}
+
+
+class RuleError(ValueError):
+    pass
+
+
+def _condition_source(condition):
+    feature, operator, value = condition
+    if feature not in FEATURES:
+        raise RuleError(f"unknown feature {feature!r}")
+    if operator not in OPERATORS:
+        raise RuleError(f"unknown operator {operator!r}")
+    if operator == 'in':
+        return f"{feature} in {tuple(value)!r}"
+    return f"{feature} {operator} {_literal(value)}"
+
+
+def _literal(value):
+    """Source for a number, including the infinities used to force a condition on or off"""
+    if isinstance(value, float) and value in (math.inf, -math.inf):
+        return f"float('{value}')"
+    return repr(value)
+
+
+def _when_source(when):
+    return ' and '.join(map(_condition_source, when)) or 'True'
+
+
+def _action_source(target, row):
+    if 'multiply' in row:
+        return f"{target} = {target} * {row['multiply']!r}"
+    if 'add' in row:
+        return f"{target} = {target} + {row['add']!r}"
+    raise RuleError(f"rule has no action: {row!r}")
+
+
+def _negation(condition):
+    feature, operator, value = condition
+    return [feature, NEGATIONS[operator], value] if operator in NEGATIONS else None
+
+
+def _shared_prefix(whens):
+    """Number of leading conditions every when shares"""
+    length = 0
+    while all(len(when) > length and list(when[length]) == list(whens[0][length]) for when in whens):
+        length += 1
+    return length
+
+
+def _first_match_lines(rows, target):
+    """An if/elif chain of (when, row) pairs, nesting runs of rows that start with the same condition
+
+    A run is only nested under its shared conditions when that cannot change
+    which row matches: the run ends in a catch-all, nothing follows it, or
+    every later row starts with the negation of its first condition (which
+    becomes the else branch), so shared tests run once per case.
+    """
+    lines = []
+    keyword = 'if'
+    index = 0
+    while index < len(rows):
+        when, row = rows[index]
+        if not when:
+            lines.append('else:' if lines else 'if True:')
+            lines.append(f"    {_action_source(target, row)}")
+            return lines
+        end = index + 1
+        while end < len(rows) and rows[end][0][:1] and list(rows[end][0][0]) == list(when[0]):
+            end += 1
+        run, rest = rows[index:end], rows[end:]
+        if len(run) > 1:
+            shared = _shared_prefix([run_when for run_when, _ in run])
+            inner = [(run_when[shared:], run_row) for run_when, run_row in run]
+            if not rest or any(not inner_when for inner_when, _ in inner):
+                lines.append(f"{keyword} {_when_source(when[:shared])}:")
+                lines.extend('    ' + line for line in _first_match_lines(inner, target))
+                keyword = 'elif'
+                index = end
+                continue
+            negated = _negation(when[0])
+            if negated is not None and all(rest_when[:1] and list(rest_when[0]) == negated
+                                           for rest_when, _ in rest):
+                lines.append(f"{keyword} {_condition_source(when[0])}:")
+                lines.extend('    ' + line for line in _first_match_lines([(w[1:], r) for w, r in run], target))
+                lines.append('else:')
+                lines.extend('    ' + line for line in _first_match_lines([(w[1:], r) for w, r in rest], target))
+                return lines
+        lines.append(f"{keyword} {_when_source(when)}:")
+        lines.append(f"    {_action_source(target, row)}")
+        keyword = 'elif'
+        index += 1
+    return lines
+
+
+def _tier_lines(var, source, tiers):
+    """Marginal tiers, with the filled-tier base accumulated left to right like the JS literals"""
+    lines = []
+    base = None
+    start = 0
+    for index, (upper, rate) in enumerate(tiers):
+        if index == 0:
+            value = f"{source} * {rate!r}"
+        else:
+            value = f"{base!r} + ({source} - {start!r}) * {rate!r}"
+        if upper is None:
+            lines.append(('else:' if index else 'if True:', f"{var} = {value}"))
+            break
+        keyword = 'if' if index == 0 else 'elif'
+        lines.append((f"{keyword} {source} <= {upper!r}:", f"{var} = {value}"))
+        filled = (upper - start) * rate
+        base = filled if base is None else base + filled
+        start = upper
+    return lines
+
+
+def _component_lines(index, component):
+    var = f"component_{index}"
+    source = component['input']
+    if source not in FEATURES:
+        raise RuleError(f"unknown component input {source!r}")
+    body = []
+
+    branches = []
+    catch_all = False
+    for row in component.get('table', []):
+        if 'flat' in row:
+            value = repr(row['flat'])
+        elif 'rate' in row:
+            value = f"{source} * {row['rate']!r}"
+        else:
+            raise RuleError(f"table row has neither flat nor rate: {row!r}")
+        if not row['when']:
+            branches.append(('else:' if branches else 'if True:', f"{var} = {value}"))
+            catch_all = True
+            break
+        keyword = 'elif' if branches else 'if'
+        branches.append((f"{keyword} {_when_source(row['when'])}:", f"{var} = {value}"))
+
+    tiers = component.get('tiers')
+    if tiers and not catch_all:
+        tier_lines = _indent_branches(_tier_lines(var, source, tiers))
+        if branches:
+            body.extend(_indent_branches(branches))
+            body.append('else:')
+            body.extend('    ' + line for line in tier_lines)
+        else:
+            body.extend(tier_lines)
+    else:
+        body.extend(_indent_branches(branches))
+
+    for row in component.get('adjustments', []):
+        body.append(f"if {_when_source(row['when'])}:")
+        body.append(f"    {_action_source(var, row)}")
+
+    # Names are repr()'d so no rule set can end the comment and inject source
+    lines = [f"# component: {component.get('name', var)!r}"]
+    assigned = catch_all or bool(tiers and tiers[-1][0] is None)
+    if component.get('positive_only') or not assigned:
+        lines.append(f"{var} = 0")
+    if component.get('positive_only'):
+        lines.append(f"if {source} > 0:")
+        lines.extend('    ' + line for line in body)
+    else:
+        lines.extend(body)
+    return var, lines
+
+
+def _indent_branches(branches):
+    lines = []
+    for header, statement in branches:
+        lines.append(header)
+        lines.append('    ' + statement)
+    return lines
+
+
+def _features_used(rules):
+    used = {component['input'] for component in rules['components']}
+    used.update(condition[0] for _, condition in _conditions(rules, ()))
+    return used
+
+
+def generate_source(rules):
+    """Python source of evaluate_batch(durations, miles, receipts) for a rule set"""
+    lines = []
+    used = _features_used(rules)
+    for feature in ('miles_per_day', 'spending_per_day'):
+        if feature in used:
+            lines.append(DERIVED_FEATURES[feature])
+
+    totals = []
+    for index, component in enumerate(rules['components']):
+        var, component_lines = _component_lines(index, component)
+        totals.append(var)
+        lines.extend(component_lines)
+    lines.append(f"reimbursement = {' + '.join(totals) if totals else '0'}")
+
+    for group in rules.get('adjustments', []):
+        lines.append(f"# adjustments: {group.get('name', '')!r}")
+        mode = group.get('mode', 'all')
+        if mode not in ('first', 'all'):
+            raise RuleError(f"unknown adjustment mode {mode!r}")
+        if mode == 'first':
+            lines.extend(_first_match_lines([(row['when'], row) for row in group['rules']], 'reimbursement'))
+            continue
+        for row in group['rules']:
+            lines.append(f"if {_when_source(row['when'])}:")
+            lines.append(f"    {_action_source('reimbursement', row)}")
+
+    if rules.get('floor') is not None:
+        lines.append(f"if reimbursement < {rules['floor']!r}:")
+        lines.append(f"    reimbursement = {rules['floor']!r}")
+    lines.append("append(reimbursement)")
+
+    # The JS string helpers run a column at a time, outside the per-case branching
+    if 'cents' in used:
+        header = ["    cents_column = list(map(js_cents, receipts))",
+                  "    for D, M, R, cents in zip(durations, miles, receipts, cents_column):"]
+    else:
+        header = ["    for D, M, R in zip(durations, miles, receipts):"]
+    return '\n'.join([
+        "def evaluate_batch(durations, miles, receipts):",
+        "    results = []",
+        "    append = results.append",
+    ] + header + ['        ' + line for line in lines] + ["    return list(map(js_to_fixed_2, results))", ""])
+
+
+class RuleSet:
+    """A compiled rule set, usable anywhere a calculator is expected"""
+
+    def __init__(self, rules, name=None):
+        self.rules = rules
+        self.name = name or rules.get('name', 'rules')
+        self.source = generate_source(rules)
+        namespace = {'js_cents': js_cents, 'js_div': js_div, 'js_to_fixed_2': js_to_fixed_2}
+        exec(compile(self.source, f"<rules:{self.name}>", 'exec'), namespace)
+        self.evaluate_parsed = namespace['evaluate_batch']
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls(json.load(f), path)
+
+    def evaluate(self, durations, miles, receipts):
+        """Evaluate raw case values, parsed the way the JS command line parses them"""
+        # Column by column, so the batch needs no transposing
+        return self.evaluate_parsed([cli_int(d) for d in durations], [cli_int(m) for m in miles],
+                                    [float(r) for r in receipts])
+
+    def evaluate_lines(self, lines):
+        parsed = [parse_args(*line.split(' ')) for line in lines]
+        return self.evaluate_parsed(*zip(*parsed)) if parsed else []
+
+    def thresholds(self):
+        """Yield (path, feature, operator, value) for every numeric condition"""
+        for path, (feature, operator, value) in _conditions(self.rules, ()):
+            if operator != 'in':
+                yield path, feature, operator, value
+
+    def with_value(self, path, value):
+        """A new RuleSet with the value at path (e.g. a condition's threshold) replaced"""
+        rules = copy.deepcopy(self.rules)
+        node = rules
+        for key in path[:-1]:
+            node = node[key]
+        node[path[-1]] = value
+        return RuleSet(rules, self.name)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _conditions(node, path):
+    """Yield (path, condition) for every condition in a rule set"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == 'when':
+                for index, condition in enumerate(value):
+                    yield path + (key, index), condition
+            else:
+                yield from _conditions(value, path + (key,))
+    elif isinstance(node, list):
+        for index, value in enumerate(node):
+            yield from _conditions(value, path + (index,))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('rules', nargs='?', default='calculate_rules.json')
+    parser.add_argument('--show-source', action='store_true', help='print the compiled evaluator')
+    args = parser.parse_args()
+
+    rule_set = RuleSet.load(args.rules)
+    if args.show_source:
+        print(rule_set.source)
+        return
+
+    print(f"=== RULE SET: {rule_set.name} ===")
+    print("Path                                       | Feature          | Op | Value")
+    print("-" * 80)
+    for path, feature, operator, value in rule_set.thresholds():
+        print(f"{'/'.join(map(str, path)):42s} | {feature:16s} | {operator:2s} | {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,4 +5,12 @@
 # Usage: ./run.sh <trip_duration_days> <miles_traveled> <total_receipts_amount>
 
 # Node.js implementation
-node calculate_formula.js "$1" "$2" "$3" 
\ No newline at end of file
+# Region-weighted blend of calculate.js and calculate_formula.js (see ensemble.py)
+# Starts from a prebuilt V8 snapshot when it is newer than every source it was
+# built from (python3 cold_start.py --build), otherwise runs the module directly
+BLOB=calculator.blob
+if [ -f $BLOB ] && [ $BLOB -nt fast_start.js ] && [ $BLOB -nt calculate_ensemble.js ] \
+    && [ $BLOB -nt ensemble_weights.json ] && [ $BLOB -nt calculate.js ] && [ $BLOB -nt calculate_formula.js ]; then
+    { node --snapshot-blob $BLOB -- "$1" "$2" "$3"; } 2>/dev/null && exit 0
+fi
+node calculate_ensemble.js "$1" "$2" "$3"
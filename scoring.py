@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""The eval.sh scoring rules, applied to batches of calculator outputs.
+
+Money is scored as exact integers: outputs and expected values become
+int64 counts of cents (array('q')), so the ±$0.01 exact-match test is
+error == 0 and no float rounding can flip a case across the boundary.
+Outputs with sub-cent digits, which bc would also compare exactly, are
+scored at a finer fixed-point scale instead.
+"""
+import re
+from array import array
+
+VALID_OUTPUT = re.compile(r'^-?[0-9]+\.?[0-9]*$')
+
+# Marks an output that eval.sh would reject, in integer columns
+INVALID = -2 ** 63
+
+
+def parse_fixed(text, places=2):
+    """Exact fixed-point integer for a decimal string: parse_fixed('-12.5') == -1250"""
+    negative = text.startswith('-')
+    whole, _, fraction = text.lstrip('+-').partition('.')
+    if len(fraction) > places:
+        raise ValueError(f"{text!r} has more than {places} decimal places")
+    value = int(whole or '0') * 10 ** places + int(fraction.ljust(places, '0'))
+    return -value if negative else value
+
+
+def to_fixed(value, places=2):
+    """Fixed-point integer for a float read from JSON with at most `places` decimals"""
+    return round(value * 10 ** places)
+
+
+def output_places(outputs):
+    """Fixed-point scale that represents every valid output exactly (at least cents)"""
+    places = 2
+    for output in outputs:
+        if output[-3:-2] != '.' and VALID_OUTPUT.match(output):
+            places = max(places, len(output.partition('.')[2]))
+    return places
+
+
+def parse_outputs(outputs, places=2):
+    """Calculator output strings as an int64 column, INVALID where eval.sh would reject them"""
+    parsed = array('q')
+    append = parsed.append
+    for output in outputs:
+        if not VALID_OUTPUT.match(output):
+            append(INVALID)
+        elif places == 2 and output[-3:-2] == '.':
+            append(int(output.replace('.', '', 1)))  # toFixed(2) output, the common case
+        else:
+            append(parse_fixed(output, places))
+    return parsed
+
+
+def eval_score(total_error, successful_runs, exact_matches, num_cases, places=2):
+    """(average error, score) in dollars from fixed-point totals, or (None, None) if nothing ran.
+
+    Both follow bc's scale=2 truncation, computed with integer division.
+    """
+    if successful_runs == 0:
+        return None, None
+    avg_cents = total_error // (successful_runs * 10 ** (places - 2))
+    score_cents = avg_cents * 100 + (num_cases - exact_matches) * 10
+    return avg_cents / 100, score_cents / 100
+
+
+def score_fixed(actual, expected, places=2):
+    """Score int64 outputs against int64 expected values at the same fixed-point scale"""
+    num_cases = len(expected)
+    one_cent = 10 ** (places - 2)
+    one_dollar = 10 ** places
+    successful_runs = 0
+    exact_matches = 0
+    close_matches = 0
+    total_error = 0
+    max_error = 0
+    errors = array('q')
+
+    for output, target in zip(actual, expected):
+        if output == INVALID:
+            errors.append(INVALID)
+            continue
+        error = abs(output - target)
+        errors.append(error)
+        successful_runs += 1
+        if error < one_cent:
+            exact_matches += 1
+        if error < one_dollar:
+            close_matches += 1
+        total_error += error
+        if error > max_error:
+            max_error = error
+
+    avg_error, score = eval_score(total_error, successful_runs, exact_matches, num_cases, places)
+
+    return {
+        'num_cases': num_cases,
+        'successful_runs': successful_runs,
+        'exact_matches': exact_matches,
+        'close_matches': close_matches,
+        'avg_error': avg_error,
+        'max_error': max_error / one_dollar,
+        'score': score,
+        'places': places,
+        'fixed_errors': errors,
+        'errors': [None if error == INVALID else error / one_dollar for error in errors],
+    }
+
+
+def score_outputs(outputs, expected):
+    """Score calculator outputs against expected values exactly as eval.sh does"""
+    outputs = list(outputs)
+    places = output_places(outputs)
+    return score_fixed(parse_outputs(outputs, places), array('q', [to_fixed(value, places) for value in expected]),
+                       places)
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""Filesystem work queue for distributed parameter sweeps.
+
+The coordinator shards candidate parameter sets into work units and writes
+them, with a snapshot of the public cases, into a queue directory:
+
+    <queue>/cases.json            cases every worker loads once
+    <queue>/rules.json            the swept rule set (--engine rules)
+    <queue>/pending/<unit>.json   units waiting for a worker
+    <queue>/claimed/<unit>@<claim>.json
+                                  units a worker is evaluating (mtime = heartbeat)
+    <queue>/done/<unit>.json      finished units and their scores
+    <queue>/leaderboard.json      best candidates across every finished unit
+
+Workers claim a unit with an atomic rename from pending/ to claimed/, so any
+number of processes on any number of hosts sharing the directory can pull
+from the same queue. Every claim gets its own file name, so a worker whose
+lease expired never heartbeats or releases someone else's later claim. A finished unit is written to done/ before its claim is
+released, and claims whose heartbeat is older than the lease are moved back
+to pending/, so a worker that dies mid-unit only costs that one unit and a
+restarted sweep never re-evaluates finished units.
+
+Two engines can be swept:
+- formula: the eight FORMULA_CONSTANTS and the RECEIPT_CAP_BANDS of
+  calculate_formula.js, evaluated with the bit-exact Python port.
+- rules: every numeric threshold of a rule set such as calculate_rules.json
+  (calculate.js), compiled by rule_engine.py.
+
+Usage:
+  python3 sweep_queue.py init --queue sweep_work --engine formula --candidates 2000
+  python3 sweep_queue.py worker --queue sweep_work        (on every host sharing the directory)
+  python3 sweep_queue.py run --queue sweep_work --workers 4
+  python3 sweep_queue.py leaderboard --queue sweep_work
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+from reimbursement import FORMULA_CONSTANTS, RECEIPT_CAP_BANDS, calculate_formula, cli_args
+from rule_engine import RuleSet
+from scoring import score_outputs
+from threshold_sweep import SWEEP_OPERATORS
+from trip_cases import load_public_cases
+
+QUEUE_STATES = ('pending', 'claimed', 'done')
+
+
+# ==========================================
+# QUEUE DIRECTORY
+# ==========================================
+def write_json_atomic(path, data):
+    """Write JSON next to its destination and rename it into place"""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w') as f:
+        json.dump(data, f)
+    os.replace(temporary, path)
+
+
+def read_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def queue_path(queue, state, unit=None):
+    directory = os.path.join(queue, state)
+    return directory if unit is None else os.path.join(directory, unit + '.json')
+
+
+def units_in(queue, state):
+    return sorted(name[:-5] for name in os.listdir(queue_path(queue, state)) if name.endswith('.json'))
+
+
+def claimed_unit(name):
+    """Unit of a claimed/ entry named <unit>@<claim>"""
+    return name.split('@', 1)[0]
+
+
+def claim(queue):
+    """Atomically move the first available pending unit to claimed/; returns (unit, claim path) or None"""
+    for unit in units_in(queue, 'pending'):
+        claimed = queue_path(queue, 'claimed', f"{unit}@{uuid.uuid4().hex}")
+        try:
+            os.rename(queue_path(queue, 'pending', unit), claimed)
+        except FileNotFoundError:
+            continue  # another worker won the race
+        if os.path.exists(queue_path(queue, 'done', unit)):
+            os.remove(claimed)  # requeued after its first worker had already finished it
+            continue
+        os.utime(claimed)
+        return unit, claimed
+    return None
+
+
+def requeue_stale(queue, lease):
+    """Return expired claims to pending/ (or drop them if the unit already finished)"""
+    requeued = []
+    now = time.time()
+    for name in units_in(queue, 'claimed'):
+        unit = claimed_unit(name)
+        claimed = queue_path(queue, 'claimed', name)
+        try:
+            if now - os.path.getmtime(claimed) < lease:
+                continue
+            if os.path.exists(queue_path(queue, 'done', unit)):
+                os.remove(claimed)
+            else:
+                os.rename(claimed, queue_path(queue, 'pending', unit))
+                requeued.append(unit)
+        except FileNotFoundError:
+            continue  # finished or requeued concurrently
+    return requeued
+
+
+# ==========================================
+# CANDIDATES
+# ==========================================
+def formula_candidate(rng, spread):
+    """Random formula constants and receipt-cap bands around the current values"""
+    constants = {name: round(value * rng.uniform(1 - spread, 1 + spread), 4)
+                 for name, value in FORMULA_CONSTANTS.items()}
+    cap_bands = [[min_days + rng.choice((-1, 0, 0, 1)),
+                  round(miles_below * rng.uniform(1 - spread, 1 + spread)),
+                  round(cap * rng.uniform(1 - spread, 1 + spread))]
+                 for min_days, miles_below, cap in RECEIPT_CAP_BANDS]
+    return {'constants': constants, 'cap_bands': cap_bands}
+
+
+def rules_candidate(rng, spread, rule_set):
+    """Random thresholds around the current value of every ordering condition (not == or !=)"""
+    values = {}
+    for path, _, operator, value in rule_set.thresholds():
+        if operator not in SWEEP_OPERATORS:
+            continue
+        moved = value * rng.uniform(1 - spread, 1 + spread)
+        values['/'.join(map(str, path + (2,)))] = round(moved) if isinstance(value, int) else round(moved, 2)
+    return {'values': values}
+
+
+def baseline_candidate(engine):
+    if engine == 'formula':
+        return {'constants': dict(FORMULA_CONSTANTS), 'cap_bands': [list(band) for band in RECEIPT_CAP_BANDS]}
+    return {'values': {}}
+
+
+def generate_units(engine, count, unit_size, seed, spread, rules_path):
+    """Deterministic {unit name: candidate list}; candidate 0 is the current engine"""
+    rng = random.Random(seed)
+    rule_set = RuleSet.load(rules_path) if engine == 'rules' else None
+    candidates = [baseline_candidate(engine)]
+    while len(candidates) < count:
+        if engine == 'formula':
+            candidates.append(formula_candidate(rng, spread))
+        else:
+            candidates.append(rules_candidate(rng, spread, rule_set))
+    for candidate_id, candidate in enumerate(candidates):
+        candidate['id'] = candidate_id
+    return {f"unit_{start // unit_size:06d}": candidates[start:start + unit_size]
+            for start in range(0, len(candidates), unit_size)}
+
+
+# ==========================================
+# WORKER
+# ==========================================
+class UnitEvaluator:
+    """Scores candidates of one engine against the queue's case snapshot"""
+
+    def __init__(self, queue):
+        self.spec = read_json(os.path.join(queue, 'spec.json'))
+        cases = read_json(os.path.join(queue, 'cases.json'))
+        self.parsed = [cli_args(d, m, r) for d, m, r in zip(cases['durations'], cases['miles'], cases['receipts'])]
+        self.expected = cases['expected']
+        self.rule_set = RuleSet.load(os.path.join(queue, 'rules.json')) if self.spec['engine'] == 'rules' else None
+
+    def outputs(self, candidate):
+        if self.spec['engine'] == 'formula':
+            constants = candidate['constants']
+            cap_bands = [tuple(band) for band in candidate['cap_bands']]
+            return [calculate_formula(D, M, R, constants, cap_bands) for D, M, R in self.parsed]
+        rule_set = self.rule_set
+        for path, value in candidate['values'].items():
+            rule_set = rule_set.with_value(tuple(int(key) if key.isdigit() else key for key in path.split('/')), value)
+        return rule_set.evaluate_parsed(*zip(*self.parsed))
+
+    def score(self, candidate):
+        summary = score_outputs(self.outputs(candidate), self.expected)
+        return {key: summary[key] for key in ('score', 'avg_error', 'exact_matches', 'close_matches', 'max_error')}
+
+
+def run_worker(queue, worker_id, lease, max_units=None):
+    """Claim and evaluate units until nothing is pending or claimed; returns the number finished"""
+    evaluator = UnitEvaluator(queue)
+    finished = 0
+    while max_units is None or finished < max_units:
+        requeue_stale(queue, lease)
+        claimed_work = claim(queue)
+        if claimed_work is None:
+            if not units_in(queue, 'claimed'):
+                break
+            # Another worker holds a unit; if it died, the unit comes back once its lease expires
+            time.sleep(min(lease / 4, 1.0))
+            continue
+        unit, claimed = claimed_work
+        try:
+            candidates = read_json(claimed)
+        except FileNotFoundError:
+            continue  # the lease expired before the unit was even read
+        results = []
+        for candidate in candidates:
+            results.append(dict(candidate, **evaluator.score(candidate)))
+            try:
+                os.utime(claimed)  # heartbeat
+            except FileNotFoundError:
+                pass  # lease expired and the unit was requeued; finishing it still saves a rerun
+        write_json_atomic(queue_path(queue, 'done', unit), {'worker': worker_id, 'results': results})
+        try:
+            os.remove(claimed)
+        except FileNotFoundError:
+            pass  # requeued meanwhile; claim() drops the pending copy now that it is done
+        finished += 1
+        print(f"  [{worker_id}] {unit}: {len(results)} candidates, "
+              f"best score {min(result['score'] for result in results):.2f}", flush=True)
+    return finished
+
+
+# ==========================================
+# COORDINATOR
+# ==========================================
+def init_queue(queue, engine, count, unit_size, seed, spread, rules_path):
+    """Create the queue directory and enqueue every unit that has not already finished"""
+    for state in QUEUE_STATES:
+        os.makedirs(queue_path(queue, state), exist_ok=True)
+    spec = {'engine': engine, 'candidates': count, 'unit_size': unit_size, 'seed': seed, 'spread': spread,
+            'rules': rules_path}
+    spec_path = os.path.join(queue, 'spec.json')
+    if os.path.exists(spec_path) and read_json(spec_path) != spec:
+        raise SystemExit(f"{queue} holds a different sweep; use a new --queue directory")
+    write_json_atomic(spec_path, spec)
+
+    if engine == 'rules':
+        # Workers load the queue's copy, so they need neither the same cwd nor the same file
+        rules_copy = os.path.join(queue, 'rules.json')
+        rules = read_json(rules_path)
+        if os.path.exists(rules_copy) and read_json(rules_copy) != rules:
+            raise SystemExit(f"{rules_path} changed since {queue} was created; use a new --queue directory")
+        write_json_atomic(rules_copy, rules)
+
+    cases = load_public_cases()
+    write_json_atomic(os.path.join(queue, 'cases.json'), {
+        'durations': list(cases.durations), 'miles': list(cases.miles),
+        'receipts': list(cases.receipts), 'expected': list(cases.expected),
+    })
+
+    existing = {state: set(map(claimed_unit, units_in(queue, state))) for state in QUEUE_STATES}
+    enqueued = 0
+    for unit, candidates in generate_units(engine, count, unit_size, seed, spread, rules_path).items():
+        if not any(unit in names for names in existing.values()):
+            write_json_atomic(queue_path(queue, 'pending', unit), candidates)
+            enqueued += 1
+    return enqueued, len(existing['done'])
+
+
+def merge_leaderboard(queue, top=20):
+    """Merge every finished unit into the global leaderboard and write leaderboard.json"""
+    results = []
+    for unit in units_in(queue, 'done'):
+        results.extend(read_json(queue_path(queue, 'done', unit))['results'])
+    results.sort(key=lambda result: (result['score'], result['avg_error'], result['id']))
+    write_json_atomic(os.path.join(queue, 'leaderboard.json'), {'evaluated': len(results), 'top': results[:top]})
+    return results
+
+
+def queue_counts(queue):
+    return {state: len(units_in(queue, state)) for state in QUEUE_STATES}
+
+
+def print_leaderboard(queue, top):
+    results = merge_leaderboard(queue, top)
+    counts = queue_counts(queue)
+    baseline = next((result for result in results if result['id'] == 0), None)
+    print(f"\n=== SWEEP LEADERBOARD ({len(results)} candidates evaluated; units "
+          f"{counts['done']} done, {counts['claimed']} claimed, {counts['pending']} pending) ===")
+    print("Rank | Candidate | Exact | Close | Avg Error |    Score |    Gain")
+    print("-" * 66)
+    for rank, result in enumerate(results[:top], 1):
+        gain = f"{baseline['score'] - result['score']:7.2f}" if baseline else '    N/A'
+        print(f"{rank:4d} | {result['id']:9d} | {result['exact_matches']:5d} | {result['close_matches']:5d} | "
+              f"{result['avg_error']:9.2f} | {result['score']:8.2f} | {gain}")
+    if results:
+        best = {key: value for key, value in results[0].items()
+                if key in ('constants', 'cap_bands', 'values')}
+        print(f"\nBest parameters: {json.dumps(best)}")
+
+
+def run_local(queue, workers, lease, top):
+    """Drain the queue with local worker processes, respawning workers until no unit is pending or claimed"""
+    command = [sys.executable, os.path.abspath(__file__), 'worker', '--queue', queue, '--lease', str(lease)]
+    processes = {}
+    while True:
+        for index, process in list(processes.items()):
+            if process.poll() is not None:
+                del processes[index]
+                if process.returncode != 0:
+                    print(f"  worker local-{index} exited with {process.returncode}", flush=True)
+        counts = queue_counts(queue)
+        if not counts['pending'] and not counts['claimed']:
+            break
+        for index in range(workers):
+            if index not in processes:
+                processes[index] = subprocess.Popen(command + ['--worker-id', f"local-{index}"])
+        time.sleep(0.2)
+    for process in processes.values():
+        process.wait()
+    print_leaderboard(queue, top)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_queue(command):
+        command.add_argument('--queue', default='sweep_work', help='queue directory (shared between hosts)')
+        command.add_argument('--lease', type=float, default=60.0, help='seconds before a silent claim is requeued')
+
+    def add_sweep(command):
+        command.add_argument('--engine', choices=('formula', 'rules'), default='formula')
+        command.add_argument('--rules', default='calculate_rules.json', help='rule set for --engine rules')
+        command.add_argument('--candidates', type=int, default=2000)
+        command.add_argument('--unit-size', type=int, default=50)
+        command.add_argument('--seed', type=int, default=0)
+        command.add_argument('--spread', type=float, default=0.1, help='relative range around current values')
+
+    init = commands.add_parser('init', help='create the queue and enqueue unfinished units')
+    add_queue(init)
+    add_sweep(init)
+
+    worker = commands.add_parser('worker', help='claim and evaluate units until the queue is empty')
+    add_queue(worker)
+    worker.add_argument('--worker-id', default=f"{socket.gethostname()}-{os.getpid()}")
+    worker.add_argument('--max-units', type=int, default=None, help='stop after this many units')
+
+    run = commands.add_parser('run', help='init, then drain the queue with local worker processes')
+    add_queue(run)
+    add_sweep(run)
+    run.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    run.add_argument('--top', type=int, default=10)
+
+    leaderboard = commands.add_parser('leaderboard', help='merge finished units and print the leaderboard')
+    add_queue(leaderboard)
+    leaderboard.add_argument('--top', type=int, default=10)
+
+    args = parser.parse_args()
+    if args.command in ('init', 'run'):
+        enqueued, done = init_queue(args.queue, args.engine, args.candidates, args.unit_size, args.seed,
+                                    args.spread, args.rules)
+        print(f"🗂️  Queue {args.queue}: {enqueued} units enqueued, {done} already finished")
+    if args.command == 'run':
+        run_local(args.queue, args.workers, args.lease, args.top)
+    elif args.command == 'worker':
+        finished = run_worker(args.queue, args.worker_id, args.lease, args.max_units)
+        print(f"  [{args.worker_id}] finished {finished} units", flush=True)
+    elif args.command == 'leaderboard':
+        print_leaderboard(args.queue, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Incremental threshold sweeps over a rule set's boundaries.
+
+A single threshold only changes a case's result through one condition, so
+each case has exactly two possible outputs: the condition forced true or
+forced false. The sweep evaluates the rule set twice, sorts the cases by the
+condition's feature, and walks every distinct feature value in order,
+flipping only the cases that cross the boundary and updating the eval.sh
+score incrementally. Sweeping every candidate costs two evaluations and one
+pass instead of one full evaluation per candidate.
+
+Usage: python3 threshold_sweep.py [--rules calculate_rules.json] [--path adjustments/0/rules/7/when/1]
+"""
+import argparse
+import math
+
+from reimbursement import cli_args
+from rule_engine import RuleError, RuleSet
+from scoring import INVALID, eval_score, output_places, parse_outputs, score_outputs, to_fixed
+from trip_cases import load_public_cases
+
+# For each operator: is the condition true for cases below the threshold, and is
+# a case exactly at the threshold on the "below" side?
+SWEEP_OPERATORS = {
+    '>=': (False, False),
+    '>': (False, True),
+    '<=': (True, True),
+    '<': (True, False),
+}
+
+
+def parse_path(text):
+    return tuple(int(part) if part.isdigit() else part for part in text.split('/'))
+
+
+def format_path(path):
+    return '/'.join(map(str, path))
+
+
+def feature_values(cases, feature):
+    """Values of a rule feature per case, after CLI parsing, as the compiled rules see them"""
+    values = []
+    for d, m, r in zip(cases.durations, cases.miles, cases.receipts):
+        D, M, R = cli_args(d, m, r)
+        values.append({'D': D, 'M': M, 'R': R, 'miles_per_day': M / D, 'spending_per_day': R / D}[feature])
+    return values
+
+
+def sweep_threshold(rule_set, path, cases):
+    """Score every distinct feature value as the threshold at path.
+
+    Returns (current value, [(threshold, avg_error, exact_matches, score), ...])
+    in ascending threshold order.
+    """
+    feature, operator, current = _condition_at(rule_set.rules, path)
+    if operator not in SWEEP_OPERATORS:
+        raise RuleError(f"cannot sweep a {operator!r} condition")
+    true_below, at_threshold_below = SWEEP_OPERATORS[operator]
+
+    # The only two outcomes a case can have
+    force_true, force_false = (-math.inf, math.inf) if operator in ('>=', '>') else (math.inf, -math.inf)
+    outputs_true = rule_set.with_value(path + (2,), force_true).evaluate(cases.durations, cases.miles, cases.receipts)
+    outputs_false = rule_set.with_value(path + (2,), force_false).evaluate(cases.durations, cases.miles, cases.receipts)
+    places = output_places(outputs_true + outputs_false)
+    one_cent = 10 ** (places - 2)
+    expected = [to_fixed(value, places) for value in cases.expected]
+    when_true, when_false = ([None if output == INVALID else abs(output - target)
+                              for output, target in zip(parse_outputs(outputs, places), expected)]
+                             for outputs in (outputs_true, outputs_false))
+
+    values = feature_values(cases, feature)
+    order = sorted(range(len(values)), key=values.__getitem__)
+    num_cases = len(values)
+
+    # Start with every case on the "above" side of the lowest possible threshold
+    above = when_false if true_below else when_true
+    below = when_true if true_below else when_false
+    total_error = 0
+    successful = 0
+    exact = 0
+    for error in above:
+        if error is not None:
+            total_error += error
+            successful += 1
+            exact += error < one_cent
+
+    results = []
+    pointer = 0
+    candidates = sorted(set(values) | {current})
+    for threshold in candidates:
+        # Move every case that is now below the threshold across the boundary
+        while pointer < num_cases:
+            row = order[pointer]
+            value = values[row]
+            if value > threshold or (value == threshold and not at_threshold_below):
+                break
+            for error, sign in ((above[row], -1), (below[row], 1)):
+                if error is not None:
+                    total_error += sign * error
+                    successful += sign
+                    exact += sign * (error < one_cent)
+            pointer += 1
+        avg_error, score = eval_score(total_error, successful, exact, num_cases, places)
+        results.append((threshold, avg_error, exact, score))
+    return current, results
+
+
+def _condition_at(rules, path):
+    node = rules
+    for key in path:
+        node = node[key]
+    if not (isinstance(node, list) and len(node) == 3 and isinstance(node[0], str)):
+        raise RuleError(f"{format_path(path)} is not a condition")
+    return node
+
+
+def rank_key(result):
+    return math.inf if result[3] is None else result[3]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rules', default='calculate_rules.json')
+    parser.add_argument('--path', action='append', help='condition path to sweep (default: every threshold)')
+    parser.add_argument('--top', type=int, default=10, help='best thresholds to list per path')
+    args = parser.parse_args()
+
+    rule_set = RuleSet.load(args.rules)
+    cases = load_public_cases()
+    if args.path:
+        paths = [parse_path(path) for path in args.path]
+    else:
+        paths = [path for path, _, operator, _ in rule_set.thresholds() if operator in SWEEP_OPERATORS]
+
+    baseline = score_outputs(rule_set.evaluate(cases.durations, cases.miles, cases.receipts), cases.expected)
+    print("🎚️  THRESHOLD SWEEP")
+    print("=" * 50)
+    print(f"Rule set: {rule_set.name}, {len(cases)} cases, baseline score {baseline['score']:.2f}\n")
+
+    summary = []
+    for path in paths:
+        feature, operator, _ = _condition_at(rule_set.rules, path)
+        current, results = sweep_threshold(rule_set, path, cases)
+        best = min(results, key=rank_key)
+        summary.append((path, feature, operator, current, best))
+        if args.path:
+            print(f"=== {format_path(path)}: {feature} {operator} {current} ===")
+            print("Threshold | Avg Error | Exact |    Score")
+            print("-" * 42)
+            for threshold, avg_error, exact, score in sorted(results, key=rank_key)[:args.top]:
+                marker = '  (current)' if threshold == current else ''
+                print(f"{threshold:9.2f} | {avg_error:9.2f} | {exact:5d} | {score:8.2f}{marker}")
+            print()
+
+    print("Path                                | Condition                    |  Best value | Best score |   Gain")
+    print("-" * 100)
+    for path, feature, operator, current, (threshold, _, _, score) in sorted(
+            summary, key=lambda item: rank_key(item[4])):
+        condition = f"{feature} {operator} {current}"
+        print(f"{format_path(path):35s} | {condition:28s} | {threshold:11.2f} | {score:10.2f} | {baseline['score'] - score:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Successive-halving tournament between calculator variants.
+
+All variants are scored on a small shuffled subset of the public cases; the
+better half advances and is scored on twice as many cases, and so on until
+the survivors have been scored on every case with the eval.sh formula.
+
+Usage: python3 tournament.py [variant.js | ./run-script ...]
+"""
+import argparse
+import glob
+import math
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from calculators import evaluate_cases, get_calculator
+from scoring import score_outputs
+from trip_cases import load_public_cases
+
+
+def default_variants():
+    return sorted(path for path in glob.glob('calculate*.js'))
+
+
+def default_initial_cases(num_variants, num_cases, eta, minimum=50):
+    """Size the first round so the last halving lands on the full case set"""
+    rounds = max(0, math.ceil(math.log(max(num_variants, 1), eta)))
+    return min(num_cases, max(minimum, num_cases // (eta ** rounds)))
+
+
+def rank_key(summary):
+    return math.inf if summary['score'] is None else summary['score']
+
+
+def run_tournament(variant_paths, cases, initial_cases=None, eta=2, seed=42, workers=None):
+    """Run successive halving and return {variant: (round, cases scored, summary)}"""
+    order = list(range(len(cases)))
+    random.Random(seed).shuffle(order)
+    shuffled = cases.take(order)
+
+    if initial_cases is None:
+        initial_cases = default_initial_cases(len(variant_paths), len(cases), eta)
+    budget = min(initial_cases, len(cases))
+
+    calculators = {path: get_calculator(path) for path in variant_paths}
+    outputs = {path: [] for path in variant_paths}
+    standings = {}
+    alive = list(variant_paths)
+    round_number = 0
+
+    def advance(path):
+        # Only the cases added since the previous round are evaluated
+        done = len(outputs[path])
+        outputs[path].extend(evaluate_cases(calculators[path], shuffled[done:budget]))
+        return path, score_outputs(outputs[path], shuffled.expected[:budget])
+
+    workers = workers or min(len(alive), 2 * (os.cpu_count() or 1))
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            while True:
+                round_number += 1
+                results = dict(pool.map(advance, alive))
+                alive.sort(key=lambda path: rank_key(results[path]))
+                for path in alive:
+                    standings[path] = (round_number, budget, results[path])
+
+                best = results[alive[0]]
+                print(f"Round {round_number}: {len(alive):3d} variants x {budget:4d} cases "
+                      f"| best {os.path.basename(alive[0])} score {best['score']}")
+
+                if budget >= len(cases):
+                    break
+                alive = alive[:max(1, math.ceil(len(alive) / eta))]
+                budget = len(cases) if len(alive) == 1 else min(len(cases), budget * eta)
+    finally:
+        for calculator in calculators.values():
+            calculator.close()
+
+    return standings
+
+
+def print_leaderboard(standings, num_cases):
+    """Finalists first (full eval.sh score), then by how far each variant got"""
+    ranked = sorted(standings.items(), key=lambda item: (-item[1][0], rank_key(item[1][2])))
+
+    print("\n=== TOURNAMENT LEADERBOARD ===")
+    print("Rank | Variant                        | Cases | Exact | Close | Avg Error |    Score | Status")
+    print("-" * 95)
+    for rank, (path, (round_number, scored, summary)) in enumerate(ranked, 1):
+        status = 'FINAL' if scored >= num_cases else f"out in round {round_number}"
+        avg_error = 'N/A' if summary['avg_error'] is None else f"{summary['avg_error']:.2f}"
+        score = 'N/A' if summary['score'] is None else f"{summary['score']:.2f}"
+        print(f"{rank:4d} | {os.path.basename(path):30s} | {scored:5d} | {summary['exact_matches']:5d} | "
+              f"{summary['close_matches']:5d} | {avg_error:>9s} | {score:>8s} | {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('variants', nargs='*', help='calculator modules (*.js) or run.sh-style scripts')
+    parser.add_argument('--initial-cases', type=int, default=None,
+                        help='cases scored in the first round (default: sized to the field)')
+    parser.add_argument('--eta', type=int, default=2, help='keep 1/eta of the field each round')
+    parser.add_argument('--seed', type=int, default=42, help='case shuffle seed')
+    parser.add_argument('--workers', type=int, default=None, help='variants evaluated concurrently')
+    args = parser.parse_args()
+
+    variants = args.variants or default_variants()
+    cases = load_public_cases()
+
+    print("🏁 CALCULATOR TOURNAMENT")
+    print("=" * 50)
+    print(f"{len(variants)} variants, {len(cases)} cases, eta={args.eta}\n")
+
+    try:
+        standings = run_tournament(variants, cases, args.initial_cases, args.eta, args.seed, args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+    print_leaderboard(standings, len(cases))
+
+
+if __name__ == "__main__":
+    main()
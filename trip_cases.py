@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Column-oriented dataset of reimbursement trip cases.
+
+Cases are stored as typed arrays (one per column) instead of one dict per
+case. Rows are exposed through small __slots__ views, and derived per-day
+features are computed lazily, once per dataset, and cached. Money columns
+are also available as exact int64 cents (receipts_cents, expected_cents,
+current_cents), which the error column is computed from.
+"""
+import json
+from array import array
+from itertools import compress
+
+from scoring import to_fixed
+
+# Derived columns: name -> (numerator column, denominator column)
+DERIVED_COLUMNS = {
+    'miles_per_day': ('miles', 'durations'),
+    'spending_per_day': ('receipts', 'durations'),
+    'expected_per_day': ('expected', 'durations'),
+    'current_per_day': ('current', 'durations'),
+}
+
+# Money columns also available as exact int64 cents, e.g. cases.expected_cents
+CENTS_COLUMNS = {'receipts_cents': 'receipts', 'expected_cents': 'expected', 'current_cents': 'current'}
+
+
+class TripCase:
+    """Read-only view of a single row in a TripCases dataset"""
+    __slots__ = ('_cases', '_row')
+
+    def __init__(self, cases, row):
+        self._cases = cases
+        self._row = row
+
+    @property
+    def case_id(self):
+        return self._cases.case_ids[self._row]
+
+    @property
+    def duration(self):
+        return self._cases.durations[self._row]
+
+    @property
+    def miles(self):
+        return self._cases.miles[self._row]
+
+    @property
+    def receipts(self):
+        return self._cases.receipts[self._row]
+
+    @property
+    def expected(self):
+        return self._cases.expected[self._row]
+
+    @property
+    def current(self):
+        return self._cases.current[self._row]
+
+    @property
+    def error(self):
+        return self._cases.errors[self._row]
+
+    @property
+    def miles_per_day(self):
+        return self._cases.miles_per_day[self._row]
+
+    @property
+    def spending_per_day(self):
+        return self._cases.spending_per_day[self._row]
+
+    @property
+    def expected_per_day(self):
+        return self._cases.expected_per_day[self._row]
+
+    @property
+    def current_per_day(self):
+        return self._cases.current_per_day[self._row]
+
+    @property
+    def over_under(self):
+        return 'OVER' if self.current > self.expected else 'UNDER'
+
+    def __repr__(self):
+        return (f"TripCase(case_id={self.case_id}, duration={self.duration}, "
+                f"miles={self.miles}, receipts={self.receipts})")
+
+
+class TripCases:
+    """Trip cases stored column-wise in typed arrays"""
+    __slots__ = ('case_ids', 'durations', 'miles', 'receipts', 'expected', 'current', '_derived')
+
+    def __init__(self, durations, miles, receipts, expected=None, current=None, case_ids=None):
+        self.durations = array('i', durations)
+        self.miles = array('d', miles)
+        self.receipts = array('d', receipts)
+        self.expected = array('d', expected) if expected is not None else None
+        self.current = array('d', current) if current is not None else None
+        if case_ids is None:
+            case_ids = range(len(self.durations))
+        self.case_ids = array('i', case_ids)
+        self._derived = {}
+
+    @classmethod
+    def from_public_json(cls, path='public_cases.json'):
+        """Load cases with expected outputs (public_cases.json layout)"""
+        with open(path, 'r') as f:
+            return cls.from_records(json.load(f))
+
+    @classmethod
+    def from_records(cls, raw):
+        """Build cases from already-parsed public_cases.json records"""
+        return cls([case['input']['trip_duration_days'] for case in raw],
+                   [case['input']['miles_traveled'] for case in raw],
+                   [case['input']['total_receipts_amount'] for case in raw],
+                   [case['expected_output'] for case in raw])
+
+    @classmethod
+    def from_private_json(cls, path='private_cases.json'):
+        """Load cases without expected outputs (private_cases.json layout)"""
+        with open(path, 'r') as f:
+            raw = json.load(f)
+        return cls([case['trip_duration_days'] for case in raw],
+                   [case['miles_traveled'] for case in raw],
+                   [case['total_receipts_amount'] for case in raw])
+
+    def __len__(self):
+        return len(self.durations)
+
+    def __iter__(self):
+        for row in range(len(self.durations)):
+            yield TripCase(self, row)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return self.take(range(len(self.durations))[row])
+        if row < 0:
+            row += len(self.durations)
+        if not 0 <= row < len(self.durations):
+            raise IndexError('trip case index out of range')
+        return TripCase(self, row)
+
+    def __getattr__(self, name):
+        if name in CENTS_COLUMNS:
+            return self._cents(name)
+        if name not in DERIVED_COLUMNS:
+            raise AttributeError(name)
+        derived = self._derived
+        if name not in derived:
+            numerator, denominator = DERIVED_COLUMNS[name]
+            top = getattr(self, numerator)
+            if top is None:
+                raise AttributeError(f"{name} requires the {numerator} column")
+            derived[name] = array('d', map(lambda a, b: a / b, top, getattr(self, denominator)))
+        return derived[name]
+
+    def _cents(self, name):
+        derived = self._derived
+        if name not in derived:
+            values = getattr(self, CENTS_COLUMNS[name])
+            if values is None:
+                raise AttributeError(f"{name} requires the {CENTS_COLUMNS[name]} column")
+            derived[name] = array('q', map(to_fixed, values))
+        return derived[name]
+
+    @property
+    def errors(self):
+        """Absolute error of current against expected, exact to the cent and cached like derived columns"""
+        if 'errors' not in self._derived:
+            if self.current is None or self.expected is None:
+                raise AttributeError('errors requires both expected and current columns')
+            self._derived['errors'] = array('d', map(lambda a, b: abs(a - b) / 100, self.current_cents, self.expected_cents))
+        return self._derived['errors']
+
+    def column(self, name):
+        """Return a stored or derived column by name"""
+        if name in ('duration', 'durations'):
+            return self.durations
+        if name == 'error':
+            return self.errors
+        return getattr(self, name)
+
+    def with_current(self, current):
+        """Return a dataset sharing these columns with calculator outputs attached"""
+        cases = TripCases.__new__(TripCases)
+        cases.case_ids = self.case_ids
+        cases.durations = self.durations
+        cases.miles = self.miles
+        cases.receipts = self.receipts
+        cases.expected = self.expected
+        cases.current = array('d', current)
+        cases._derived = {name: values for name, values in self._derived.items()
+                          if name in ('miles_per_day', 'spending_per_day', 'expected_per_day',
+                                      'receipts_cents', 'expected_cents')}
+        return cases
+
+    def take(self, rows):
+        """Return a new dataset holding the given rows, in the given order"""
+        rows = list(rows)
+        cases = TripCases.__new__(TripCases)
+        for name in ('case_ids', 'durations', 'miles', 'receipts', 'expected', 'current'):
+            values = getattr(self, name)
+            if values is not None:
+                values = array(values.typecode, [values[row] for row in rows])
+            setattr(cases, name, values)
+        cases._derived = {name: array(values.typecode, [values[row] for row in rows])
+                          for name, values in self._derived.items()}
+        return cases
+
+    def where(self, mask):
+        """Return a new dataset holding the rows where mask is true"""
+        cases = TripCases.__new__(TripCases)
+        mask = list(mask)
+        for name in ('case_ids', 'durations', 'miles', 'receipts', 'expected', 'current'):
+            values = getattr(self, name)
+            if values is not None:
+                values = array(values.typecode, compress(values, mask))
+            setattr(cases, name, values)
+        cases._derived = {name: array(values.typecode, compress(values, mask))
+                          for name, values in self._derived.items()}
+        return cases
+
+    def band(self, name, low=None, high=None):
+        """Rows with low <= column < high (either bound may be omitted)"""
+        values = self.column(name)
+        if low is None:
+            return self.where(value < high for value in values)
+        if high is None:
+            return self.where(value >= low for value in values)
+        return self.where(low <= value < high for value in values)
+
+    def sorted_by(self, name, reverse=False):
+        """Return the dataset reordered by a column"""
+        values = self.column(name)
+        return self.take(sorted(range(len(values)), key=values.__getitem__, reverse=reverse))
+
+    def group_by(self, name, key=None):
+        """Split the dataset into {group: TripCases} by a column, optionally mapped through key"""
+        values = self.column(name)
+        if key is not None:
+            values = map(key, values)
+        rows_by_value = {}
+        for row, value in enumerate(values):
+            rows_by_value.setdefault(value, []).append(row)
+        return {value: self.take(rows) for value, rows in rows_by_value.items()}
+
+    def mean(self, name):
+        values = self.column(name)
+        return sum(values) / len(values)
+
+
+def load_public_cases(path='public_cases.json'):
+    return TripCases.from_public_json(path)
+
+
+def load_private_cases(path='private_cases.json'):
+    return TripCases.from_private_json(path)
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""Batched inverse and what-if questions about calculateReimbursement.
+
+A query holds two of (days, miles, receipts) fixed and varies the third over
+a range, and asks one of:
+
+- plateau:     at what value does the payout stop increasing (the first
+               value where it reaches its maximum over the range)?
+- max-per-day: which value maximises reimbursement per day?
+- target:      what is the smallest value whose payout reaches a target?
+
+Every query starts from a coarse grid, then narrows by grid refinement
+(plateau, max-per-day) or bisection (target) down to the input's CLI
+resolution: whole days, whole miles, receipt cents. Each round gathers the
+points of every open query into one batched calculator call, so thousands
+of queries cost a handful of round trips. Along the way every query reports
+the cliffs (jumps of at least --cliff dollars between neighbouring inputs,
+bisected down to the exact step) and the non-monotonic regions where the
+payout falls as the input rises.
+
+Usage:
+  python3 whatif_solver.py --days 5 --miles 600 --vary receipts --ask plateau
+  python3 whatif_solver.py --queries queries.json [--calculator calculate_ensemble.js]
+  python3 whatif_solver.py                        (ops examples plus a receipt plateau for every days x miles)
+"""
+import argparse
+import json
+import time
+from collections import namedtuple
+
+from calculators import get_calculator
+
+Query = namedtuple('Query', ['days', 'miles', 'receipts', 'vary', 'low', 'high', 'ask', 'target'])
+Answer = namedtuple('Answer', ['query', 'value', 'payout', 'cliffs', 'decreasing', 'note'])
+
+INPUTS = ('days', 'miles', 'receipts')
+# Smallest step of each input that the calculators' command line can tell apart
+RESOLUTION = {'days': 1, 'miles': 1, 'receipts': 0.01}
+DEFAULT_RANGE = {'days': (1, 30), 'miles': (0, 1500), 'receipts': (0, 3000)}
+ASKS = ('plateau', 'max-per-day', 'target')
+
+
+def make_query(vary, ask, days=None, miles=None, receipts=None, low=None, high=None, target=None):
+    if vary not in INPUTS:
+        raise ValueError(f"vary must be one of {INPUTS}, not {vary!r}")
+    if ask not in ASKS:
+        raise ValueError(f"ask must be one of {ASKS}, not {ask!r}")
+    if ask == 'target' and target is None:
+        raise ValueError("a target query needs a target payout")
+    fixed = {'days': days, 'miles': miles, 'receipts': receipts}
+    missing = [name for name in INPUTS if name != vary and fixed[name] is None]
+    if missing:
+        raise ValueError(f"a query varying {vary} needs fixed {' and '.join(missing)}")
+    default_low, default_high = DEFAULT_RANGE[vary]
+    low = default_low if low is None else low
+    high = default_high if high is None else high
+    if (low if vary == 'days' else days) < 1:
+        raise ValueError("trips last at least 1 day")
+    return Query(days, miles, receipts, vary, low, high, ask, target)
+
+
+class BatchEvaluator:
+    """Evaluates (days, miles, receipts) points in batches, never asking for the same point twice"""
+
+    def __init__(self, calculator):
+        self.calculator = calculator
+        self.cache = {}
+        self.calls = 0
+
+    def evaluate(self, points):
+        new = list(dict.fromkeys(point for point in points if point not in self.cache))
+        if new:
+            durations, miles, receipts = zip(*new)
+            outputs = self.calculator.evaluate(durations, miles, receipts)
+            self.calls += 1
+            for point, output in zip(new, outputs):
+                try:
+                    self.cache[point] = float(output)
+                except ValueError:
+                    self.cache[point] = float('nan')
+        return [self.cache[point] for point in points]
+
+
+# Varied inputs are searched in integer steps of their resolution
+def _units(query, value):
+    return round(value / RESOLUTION[query.vary])
+
+
+def _value(query, units):
+    value = units * RESOLUTION[query.vary]
+    return round(value, 2) if query.vary == 'receipts' else int(value)
+
+
+def _point(query, units):
+    point = {'days': query.days, 'miles': query.miles, 'receipts': query.receipts, query.vary: _value(query, units)}
+    return point['days'], point['miles'], point['receipts']
+
+
+def _grid(low, high, count):
+    """Up to count evenly spread integers from low to high, both ends included"""
+    if high - low < count:
+        return list(range(low, high + 1))
+    return sorted({low + (high - low) * index // (count - 1) for index in range(count)})
+
+
+def _profiles(evaluator, queries, brackets, count):
+    """[(units, payouts)] on a grid over each query's bracket, all in one batch"""
+    grids = [_grid(low, high, count) for low, high in brackets]
+    points = [_point(query, units) for query, grid in zip(queries, grids) for units in grid]
+    payouts = iter(evaluator.evaluate(points))
+    return [(grid, [next(payouts) for _ in grid]) for grid in grids]
+
+
+def _objective(query, units, payout):
+    if query.ask == 'max-per-day':
+        days = _value(query, units) if query.vary == 'days' else query.days
+        return payout / days
+    return payout
+
+
+def _best_index(query, grid, payouts):
+    """First grid index with the highest objective"""
+    objectives = [_objective(query, units, payout) for units, payout in zip(grid, payouts)]
+    return objectives.index(max(objectives))
+
+
+def _first_reaching(grid, payouts, target):
+    return next((index for index, payout in enumerate(payouts) if payout >= target), None)
+
+
+def _bisect_cliffs(evaluator, queries, brackets, jump):
+    """Narrow every (query index, a, b, payout a, payout b) jump down to adjacent inputs"""
+    open_brackets = [bracket for bracket in brackets if bracket[2] - bracket[1] > 1]
+    done = [bracket for bracket in brackets if bracket[2] - bracket[1] <= 1]
+    while open_brackets:
+        midpoints = [(a + b) // 2 for _, a, b, _, _ in open_brackets]
+        payouts = evaluator.evaluate([_point(queries[index], middle)
+                                      for (index, _, _, _, _), middle in zip(open_brackets, midpoints)])
+        narrowed = []
+        for (index, a, b, payout_a, payout_b), middle, payout_middle in zip(open_brackets, midpoints, payouts):
+            if abs(payout_middle - payout_a) >= abs(payout_b - payout_middle):
+                narrowed.append((index, a, middle, payout_a, payout_middle))
+            else:
+                narrowed.append((index, middle, b, payout_middle, payout_b))
+        open_brackets = [bracket for bracket in narrowed if bracket[2] - bracket[1] > 1]
+        done += [bracket for bracket in narrowed if bracket[2] - bracket[1] <= 1]
+    # A steep but smooth slope shrinks below the threshold once bisected; only real steps remain
+    return [bracket for bracket in done if abs(bracket[4] - bracket[3]) >= jump]
+
+
+def _decreasing_regions(query, grid, payouts):
+    """(from value, to value, total drop) for every run where the payout falls as the input rises"""
+    regions = []
+    start = None
+    for index in range(1, len(grid)):
+        falling = payouts[index] < payouts[index - 1]
+        if falling and start is None:
+            start = index - 1
+        if start is not None and (not falling or index == len(grid) - 1):
+            end = index if falling else index - 1
+            regions.append((_value(query, grid[start]), _value(query, grid[end]), payouts[start] - payouts[end]))
+            start = None
+    return regions
+
+
+def solve(calculator, queries, points=201, cliff=50.0):
+    """Answer every query, batching each round of evaluations across all of them"""
+    evaluator = BatchEvaluator(calculator)
+    brackets = [(_units(query, query.low), _units(query, query.high)) for query in queries]
+    profiles = _profiles(evaluator, queries, brackets, points)
+    seen = [dict(zip(grid, payouts)) for grid, payouts in profiles]  # every (units: payout) tried per query
+
+    # Shape of each query's range, from the coarse grid: falling runs and candidate cliffs
+    decreasing = [_decreasing_regions(query, grid, payouts) for query, (grid, payouts) in zip(queries, profiles)]
+    jumps = [(index, grid[position - 1], grid[position], payouts[position - 1], payouts[position])
+             for index, (grid, payouts) in enumerate(profiles)
+             for position in range(1, len(grid)) if abs(payouts[position] - payouts[position - 1]) >= cliff]
+    cliffs = [[] for _ in queries]
+    for index, a, b, payout_a, payout_b in _bisect_cliffs(evaluator, queries, jumps, cliff):
+        cliffs[index].append((_value(queries[index], a), _value(queries[index], b), payout_a, payout_b))
+        seen[index].update({a: payout_a, b: payout_b})
+
+    # Narrow each query's answer bracket until it is down to single steps
+    answers = [None] * len(queries)
+    notes = [''] * len(queries)
+    active = []
+    for index, (query, (grid, payouts)) in enumerate(zip(queries, profiles)):
+        if query.ask == 'target':
+            position = _first_reaching(grid, payouts, query.target)
+            if position is None:
+                notes[index] = 'target not reached in range'
+                continue
+            if position == 0:
+                answers[index] = grid[0]
+                continue
+            if decreasing[index]:
+                notes[index] = 'non-monotonic: first crossing'
+            brackets[index] = (grid[position - 1], grid[position])
+        else:
+            position = _best_index(query, grid, payouts)
+            brackets[index] = (grid[max(position - 1, 0)], grid[min(position + 1, len(grid) - 1)])
+        active.append(index)
+
+    while active:
+        still_open = []
+        if any(queries[index].ask == 'target' for index in active):
+            targets = [index for index in active if queries[index].ask == 'target']
+            midpoints = [(brackets[index][0] + brackets[index][1]) // 2 for index in targets]
+            payouts = evaluator.evaluate([_point(queries[index], middle) for index, middle in zip(targets, midpoints)])
+            for index, middle, payout in zip(targets, midpoints, payouts):
+                low, high = brackets[index]
+                brackets[index] = (middle, high) if payout < queries[index].target else (low, middle)
+                if brackets[index][1] - brackets[index][0] > 1:
+                    still_open.append(index)
+                else:
+                    answers[index] = brackets[index][1]
+        searches = [index for index in active if queries[index].ask != 'target']
+        if searches:
+            refined = _profiles(evaluator, [queries[index] for index in searches],
+                                [brackets[index] for index in searches], min(points, 21))
+            for index, (grid, payouts) in zip(searches, refined):
+                seen[index].update(zip(grid, payouts))
+                position = _best_index(queries[index], grid, payouts)
+                if grid[-1] - grid[0] <= len(grid) - 1:  # the grid already covered every step
+                    # The best input seen anywhere wins, e.g. the top of a cliff outside the refined bracket
+                    tried = sorted(seen[index])
+                    answers[index] = tried[_best_index(queries[index], tried, [seen[index][units] for units in tried])]
+                else:
+                    brackets[index] = (grid[max(position - 1, 0)], grid[min(position + 1, len(grid) - 1)])
+                    still_open.append(index)
+        active = still_open
+
+    results = []
+    for index, query in enumerate(queries):
+        if answers[index] is None:
+            results.append(Answer(query, None, None, cliffs[index], decreasing[index], notes[index]))
+        else:
+            value = _value(query, answers[index])
+            payout = evaluator.evaluate([_point(query, answers[index])])[0]
+            results.append(Answer(query, value, payout, cliffs[index], decreasing[index], notes[index]))
+    return results, evaluator
+
+
+def example_queries():
+    """The ops questions, plus a receipt plateau for every days x miles combination"""
+    queries = [
+        make_query('receipts', 'plateau', days=5, miles=600),
+        make_query('receipts', 'max-per-day', days=5, miles=600),
+        make_query('miles', 'target', days=3, receipts=500, target=1000),
+        make_query('days', 'max-per-day', miles=600, receipts=800, high=14),
+    ]
+    for days in range(1, 15):
+        for miles in range(0, 1300, 100):
+            queries.append(make_query('receipts', 'plateau', days=days, miles=miles))
+    return queries
+
+
+def describe(query):
+    fixed = ', '.join(f"{name}={getattr(query, name)}" for name in INPUTS if name != query.vary)
+    goal = f"target {query.target:.2f}" if query.ask == 'target' else query.ask
+    return f"{fixed}; {query.vary} in [{query.low}, {query.high}]; {goal}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calculator', default='calculate_ensemble.js', help='calculator to question (run.sh engine by default)')
+    parser.add_argument('--queries', help='JSON list of queries ({"vary": ..., "ask": ..., "days": ..., ...})')
+    parser.add_argument('--vary', choices=INPUTS, help='input to vary for a single query')
+    parser.add_argument('--ask', choices=ASKS, default='plateau')
+    parser.add_argument('--days', type=int)
+    parser.add_argument('--miles', type=int)
+    parser.add_argument('--receipts', type=float)
+    parser.add_argument('--low', type=float)
+    parser.add_argument('--high', type=float)
+    parser.add_argument('--target', type=float, help='payout to reach for --ask target')
+    parser.add_argument('--points', type=int, default=201, help='coarse grid points per query')
+    parser.add_argument('--cliff', type=float, default=50.0, help='smallest single-step jump reported as a cliff')
+    parser.add_argument('--show', type=int, default=10, help='queries to print in detail')
+    args = parser.parse_args()
+
+    try:
+        if args.queries:
+            with open(args.queries, 'r') as f:
+                queries = [make_query(**spec) for spec in json.load(f)]
+        elif args.vary:
+            queries = [make_query(args.vary, args.ask, args.days, args.miles, args.receipts, args.low, args.high,
+                                  args.target)]
+        else:
+            queries = example_queries()
+    except ValueError as e:
+        parser.error(str(e))
+
+    started = time.perf_counter()
+    with get_calculator(args.calculator) as calculator:
+        answers, evaluator = solve(calculator, queries, args.points, args.cliff)
+    seconds = time.perf_counter() - started
+
+    print("🔎 WHAT-IF SOLVER")
+    print("=" * 50)
+    print(f"{len(queries)} queries against {args.calculator} in {seconds:.2f}s: "
+          f"{len(evaluator.cache)} points in {evaluator.calls} batched calls\n")
+    for answer in answers[:args.show]:
+        print(describe(answer.query))
+        if answer.value is None:
+            print(f"  no answer ({answer.note})")
+        else:
+            per_day = answer.payout / (answer.value if answer.query.vary == 'days' else answer.query.days)
+            note = f" ({answer.note})" if answer.note else ''
+            print(f"  {answer.query.vary} = {answer.value}: payout {answer.payout:.2f}, {per_day:.2f}/day{note}")
+        for before, after, payout_before, payout_after in answer.cliffs:
+            print(f"  cliff: {before} -> {after} changes the payout {payout_before:.2f} -> {payout_after:.2f}")
+        for start, end, drop in answer.decreasing:
+            print(f"  decreasing: {start} to {end} loses {drop:.2f}")
+    if len(answers) > args.show:
+        with_cliffs = sum(1 for answer in answers if answer.cliffs)
+        non_monotonic = sum(1 for answer in answers if answer.decreasing)
+        print(f"\n... {len(answers) - args.show} more queries not shown; {with_cliffs} of {len(answers)} have cliffs, "
+              f"{non_monotonic} have non-monotonic regions")
+
+
+if __name__ == "__main__":
+    main()